@@ -0,0 +1,146 @@
+"""Cold-start benchmark: time to first paint of the main window, offscreen.
+
+Each run starts a fresh interpreter, so imports, schema checks and the first
+data load are all measured the way a classroom PC sees them::
+
+    python -m benchmarks.startup --preset district --runs 5
+
+The exit status is non-zero when the median time to first paint exceeds the
+budget, so the benchmark can gate a release.
+"""
+from __future__ import annotations
+
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse  # noqa: E402 - measured from the very first statement
+import json  # noqa: E402
+import os  # noqa: E402
+import shutil  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Dict, List, Optional, Sequence  # noqa: E402
+
+STARTUP_BUDGET_MS = 1000.0
+DATA_TIMEOUT_S = 30.0
+MILESTONES = ("first_paint_ms", "first_data_ms")
+
+
+def _elapsed_ms() -> float:
+    return (time.perf_counter() - _STARTED) * 1000
+
+
+def measure_once(db_path: Path) -> Dict[str, float]:
+    """Start the app in this process and report milestones in milliseconds."""
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from data.store import DataStore
+    from ui.main_window import MainWindow
+    from ui.theme import apply_global_palette
+
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    apply_global_palette(app)
+    imported = _elapsed_ms()
+    window = MainWindow(DataStore(db_path))
+    constructed = _elapsed_ms()
+
+    milestones: Dict[str, float] = {"imports_ms": imported, "window_ms": constructed}
+    if window.roster.is_loaded:
+        # A fast load is delivered while the constructor still runs.
+        milestones["first_data_ms"] = constructed
+    loop = QEventLoop()
+
+    def reached(key: str) -> None:
+        milestones.setdefault(key, _elapsed_ms())
+        if all(milestone in milestones for milestone in MILESTONES):
+            loop.quit()
+
+    window.firstPainted.connect(lambda: reached("first_paint_ms"))
+    window.roster.loadFinished.connect(lambda: reached("first_data_ms"))
+    QTimer.singleShot(int(DATA_TIMEOUT_S * 1000), loop.quit)
+    window.show()
+    loop.exec_()
+    window.close()
+    return milestones
+
+
+def run_child(db_path: Path) -> Dict[str, float]:
+    """Measure one cold start in a fresh interpreter against a scratch copy of ``db_path``.
+
+    The app seeds demo data and backfills badge rules on start, so the
+    original database is never opened directly.
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory(prefix="classquest-startup-") as scratch:
+        scratch_db = Path(scratch) / db_path.name
+        shutil.copyfile(db_path, scratch_db)
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", str(scratch_db)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+            cwd=Path(__file__).resolve().parent.parent,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def missing_milestones(runs: Sequence[Dict[str, float]]) -> List[str]:
+    """Milestones that at least one run did not reach within ``DATA_TIMEOUT_S``."""
+    return [milestone for milestone in MILESTONES if any(milestone not in run for run in runs)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", default="district", help="synthetic school preset (see benchmarks.synthetic)")
+    parser.add_argument("--db", type=Path, default=None, help="benchmark an existing database instead")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--child", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        print(json.dumps(measure_once(args.child)))
+        return 0
+
+    from benchmarks.synthetic import PRESETS, school_db
+
+    db_path = args.db or school_db(PRESETS[args.preset])
+    runs: List[Dict[str, float]] = [run_child(db_path) for _ in range(max(args.runs, 1))]
+    missing = missing_milestones(runs)
+    summary = {
+        key: statistics.median(run[key] for run in runs if key in run)
+        for key in ("imports_ms", "window_ms", *MILESTONES)
+        if any(key in run for run in runs)
+    }
+    first_paint = summary.get("first_paint_ms", float("inf"))
+    within_budget = first_paint <= args.budget_ms and not missing
+    for milestone in missing:
+        print(
+            f"⚠️  {milestone} wurde nicht in jedem Lauf innerhalb von {DATA_TIMEOUT_S:.0f} s erreicht", file=sys.stderr
+        )
+
+    if args.json:
+        report = {"db": str(db_path), "runs": runs, "median": summary, "budget_ms": args.budget_ms, "missing": missing}
+        print(json.dumps(report))
+    else:
+        print(f"Datenbank: {db_path} ({len(runs)} Läufe, Median)")
+        for key, value in summary.items():
+            print(f"  {key:<16}{value:8.1f} ms")
+        if missing:
+            print("❌ unvollständige Messung – siehe Warnungen")
+        else:
+            verdict = "✅ innerhalb" if within_budget else "❌ über"
+            print(f"{verdict} des Budgets von {args.budget_ms:.0f} ms bis zum ersten Paint")
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Headless benchmark suite for the data layer and the tabs.
+
+Times the core :class:`DataStore` operations and offscreen builds of every tab
+against synthetic schools of several sizes, writes the results as JSON and
+compares them with a stored baseline::
+
+    python -m benchmarks.suite --presets class school district --output results.json
+    python -m benchmarks.suite --save-baseline        # on the reference machine
+    python -m benchmarks.suite                        # later: fails on regressions
+
+Timings are medians over ``--repeat`` runs. A result counts as a regression
+when it is slower than the baseline by more than ``--tolerance`` (relative)
+and ``--min-delta-ms`` (absolute, to ignore timer noise on tiny operations).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.synthetic import PRESETS, badge_svg, school_db  # noqa: E402
+from data.store import DataStore  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+UI_TIMEOUT_S = 60.0
+
+_APP: Any = None
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+        "runs": len(ordered),
+    }
+
+
+def time_call(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """Run ``fn`` ``repeat`` times (``setup`` untimed before each) and summarize."""
+    samples = []
+    for _ in range(max(repeat, 1)):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return _summary(samples)
+
+
+# ----------------------------------------------------------------------
+# DataStore operations
+# ----------------------------------------------------------------------
+def bench_store(store: DataStore, repeat: int, rng: random.Random) -> Dict[str, Dict[str, float]]:
+    student_ids = [summary.student_id for summary in store.list_roster()]
+    icon = badge_svg(rng)
+    cold = store.clear_caches
+    return {
+        "store.list_students": time_call(store.list_students, repeat, setup=cold),
+        "store.list_roster": time_call(store.list_roster, repeat),
+        "store.roster_snapshot": time_call(store.roster_snapshot, repeat),
+        "store.get_student.cold": time_call(lambda: store.get_student(rng.choice(student_ids)), repeat, setup=cold),
+        "store.get_student.warm": time_call(lambda: store.get_student(student_ids[0]), repeat),
+        "store.list_badges.page": time_call(lambda: store.list_badges(60), repeat, setup=cold),
+        "store.bulk_grant_xp.30": time_call(
+            lambda: store.bulk_grant_xp(rng.sample(student_ids, min(30, len(student_ids))), 10), repeat
+        ),
+        "store.award_badge": time_call(
+            lambda: store.award_badge(rng.choice(student_ids), "Benchmark", "Benchmark-Orden", icon), repeat
+        ),
+        "store.list_rewards": time_call(store.list_rewards, repeat),
+    }
+
+
+# ----------------------------------------------------------------------
+# Offscreen tab builds
+# ----------------------------------------------------------------------
+def _wait_until(app: Any, done: Callable[[], bool]) -> None:
+    deadline = time.perf_counter() + UI_TIMEOUT_S
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Tab did not finish loading in time")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def bench_tabs(store: DataStore, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time each tab from construction until its first data is on screen."""
+    from PyQt5.QtWidgets import QApplication
+
+    from data.worker import AsyncDataStore
+    from ui.rewards_tab import RewardsTab
+    from ui.roster_model import RosterModel
+    from ui.students_tab import StudentsTab
+    from ui.theme import apply_global_palette
+    from ui.trophy_cabinet import TrophyCabinetTab
+    from ui.vector_assets import render_cache
+
+    global _APP
+    # One application for the whole run: Qt objects such as the render cache's
+    # thread pool do not survive a QApplication being torn down and recreated.
+    app = _APP = QApplication.instance() or QApplication([sys.argv[0]])
+    apply_global_palette(app)
+    worker = AsyncDataStore(store)
+    results: Dict[str, Dict[str, float]] = {}
+
+    def with_roster(make_tab: Callable[[RosterModel], Any]) -> Any:
+        roster = RosterModel(worker)
+        loaded: List[bool] = []
+        roster.loadFinished.connect(lambda: loaded.append(True))
+        tab = make_tab(roster)
+        roster.setParent(tab)
+        roster.reload()
+        tab.resize(1280, 800)
+        tab.show()
+        _wait_until(app, lambda: bool(loaded))
+        return tab
+
+    def students_tab() -> None:
+        tab = with_roster(lambda roster: StudentsTab(store, worker, roster))
+        _wait_until(app, lambda: tab.current_student is not None or tab.roster.rowCount() == 0)
+        tab.repaint()
+        tab.deleteLater()
+
+    def trophy_tab() -> None:
+        tab = TrophyCabinetTab(store, worker)
+        tab.resize(1280, 800)
+        tab.show()
+        _wait_until(app, lambda: tab.model.rowCount() > 0 or tab.model.exhausted)
+        tab.repaint()
+        tab.deleteLater()
+
+    def rewards_tab() -> None:
+        tab = with_roster(lambda roster: RewardsTab(store, worker, roster))
+        _wait_until(app, lambda: tab.button_grid.count() > 0)
+        tab.repaint()
+        tab.deleteLater()
+
+    def cold_start() -> None:
+        # Each build starts quiescent, with no cached rows or pre-rendered icons.
+        app.processEvents()
+        render_cache.stop_prewarm()
+        render_cache.clear()
+        store.clear_caches()
+
+    try:
+        builds = (("StudentsTab", students_tab), ("TrophyCabinetTab", trophy_tab), ("RewardsTab", rewards_tab))
+        for name, build in builds:
+            results[f"ui.{name}"] = time_call(build, repeat, setup=cold_start)
+    finally:
+        worker.shutdown(wait=True)
+        render_cache.stop_prewarm()
+    return results
+
+
+def bench_startup(db_path: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    from benchmarks.startup import DATA_TIMEOUT_S, MILESTONES, missing_milestones, run_child
+
+    runs = [run_child(db_path) for _ in range(max(repeat, 1))]
+    missing = missing_milestones(runs)
+    if missing:
+        raise RuntimeError(f"Startup milestones not reached within {DATA_TIMEOUT_S:.0f} s: {', '.join(missing)}")
+    return {f"startup.{key[:-3]}": _summary([run[key] for run in runs]) for key in MILESTONES}
+
+
+# ----------------------------------------------------------------------
+# Baseline comparison
+# ----------------------------------------------------------------------
+def compare(results: Results, baseline: Results, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Return one line per benchmark that regressed against ``baseline``."""
+    regressions = []
+    for preset, benchmarks in results.items():
+        for name, current in benchmarks.items():
+            previous = baseline.get(preset, {}).get(name)
+            if previous is None:
+                continue
+            before, after = previous["median_ms"], current["median_ms"]
+            if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                slowdown = (after / before - 1) * 100
+                regressions.append(f"{preset}/{name}: {before:.2f} ms → {after:.2f} ms (+{slowdown:.0f} %)")
+    return regressions
+
+
+def environment() -> Dict[str, str]:
+    from PyQt5.QtCore import QT_VERSION_STR
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "machine": platform.node(),
+    }
+
+
+def run_suite(presets: Sequence[str], repeat: int, include_ui: bool, include_startup: bool) -> Results:
+    results: Results = {}
+    for preset in presets:
+        source = school_db(PRESETS[preset])
+        with tempfile.TemporaryDirectory(prefix="classquest-bench-") as scratch:
+            # Writes go to a scratch copy so the cached school stays pristine.
+            db_path = Path(scratch) / source.name
+            shutil.copyfile(source, db_path)
+            store = DataStore(db_path)
+            try:
+                benchmarks = bench_store(store, repeat, random.Random(PRESETS[preset].seed))
+                if include_ui:
+                    benchmarks.update(bench_tabs(store, repeat))
+            finally:
+                store.close()
+            if include_startup:
+                benchmarks.update(bench_startup(db_path, max(repeat // 2, 1)))
+        results[preset] = benchmarks
+        print(f"✓ {preset}", file=sys.stderr)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presets", nargs="+", choices=sorted(PRESETS), default=["class", "school", "district"])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--no-ui", action="store_true", help="skip the offscreen tab builds")
+    parser.add_argument("--no-startup", action="store_true", help="skip the cold-start measurement")
+    parser.add_argument("--output", type=Path, default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.presets, args.repeat, not args.no_ui, not args.no_startup)
+    report: Dict[str, Any] = {"environment": environment(), "results": results}
+
+    regressions: List[str] = []
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+        report["baseline"] = {"path": str(args.baseline), "environment": baseline.get("environment", {})}
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.save_baseline:
+        args.baseline.write_text(text + "\n", encoding="utf-8")
+        print(f"Baseline gespeichert: {args.baseline}", file=sys.stderr)
+
+    if regressions:
+        print("❌ Regressionen gegenüber der Baseline:", file=sys.stderr)
+        for line in regressions:
+            print(f"  - {line}", file=sys.stderr)
+        return 1
+    if not args.save_baseline and not args.baseline.exists():
+        # Without a baseline nothing was compared; a green run would prove nothing.
+        print(
+            f"❌ Keine Baseline unter {args.baseline} – nichts verglichen. "
+            "Zuerst auf dem Referenzrechner mit --save-baseline anlegen.",
+            file=sys.stderr,
+        )
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Generate synthetic ``classquest.db`` files of a given size for benchmarks.
+
+Everything is written through the public :class:`DataStore` API so generated
+databases always match the current schema. Files are cached by spec, so
+repeated benchmark runs only pay for generation once::
+
+    python -m benchmarks.synthetic --preset school
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from data.batching import BadgeOp
+from data.migrations import SCHEMA_VERSION, schema_version
+from data.store import DataStore
+
+PALETTE = ("#3B82F6", "#F59E0B", "#10B981", "#EF4444", "#8B5CF6", "#EC4899", "#14B8A6", "#F97316")
+FIRST_NAMES = (
+    "Alex", "Mia", "Noah", "Emma", "Ben", "Lina", "Paul", "Lea", "Finn", "Ida", "Elias", "Zoë", "Jonas", "Ömer"
+)
+LAST_NAMES = ("Abenteuer", "Sternschnuppe", "Rakete", "Blitz", "Sonnenschein", "Müller", "Weiß", "Fuchs")
+BADGE_NAMES = ("Stern", "Rakete", "Herz", "Blitz", "Krone", "Buch", "Pinsel", "Kompass")
+CHUNK = 5000
+
+
+@dataclass(frozen=True, slots=True)
+class SchoolSpec:
+    """Shape of a generated school; ``badges`` is the total across all students."""
+
+    students: int
+    badges: int
+    classes: int
+    avatar_variants: int = 400
+    badge_variants: int = 48
+    seed: int = 42
+
+    @property
+    def file_name(self) -> str:
+        return f"classquest-{self.students}s-{self.badges}b-{self.classes}c-{self.seed}.db"
+
+
+PRESETS: Dict[str, SchoolSpec] = {
+    "class": SchoolSpec(students=30, badges=300, classes=1),
+    "school": SchoolSpec(students=1_000, badges=20_000, classes=40),
+    "district": SchoolSpec(students=50_000, badges=1_000_000, classes=2_000),
+}
+
+
+def _shapes(rng: random.Random, count: int, size: int) -> List[str]:
+    shapes = []
+    for _ in range(count):
+        color = rng.choice(PALETTE)
+        x, y = rng.randrange(size), rng.randrange(size)
+        if rng.random() < 0.5:
+            shapes.append(
+                f'<circle cx="{x}" cy="{y}" r="{rng.randrange(4, size // 6)}" fill="{color}" '
+                f'opacity="{rng.uniform(0.3, 1):.2f}"/>'
+            )
+        else:
+            points = " ".join(f"L{rng.randrange(size)} {rng.randrange(size)}" for _ in range(rng.randrange(3, 9)))
+            shapes.append(f'<path d="M{x} {y} {points} Z" fill="{color}" stroke="#1E293B" stroke-width="3"/>')
+    return shapes
+
+
+def avatar_svg(rng: random.Random) -> str:
+    """Avatar-like SVG of roughly 2-8 KB, similar to hand-made classroom avatars."""
+    body = "\n  ".join(_shapes(rng, rng.randrange(25, 90), 400))
+    return (
+        '<svg width="400" height="400" viewBox="0 0 400 400" xmlns="http://www.w3.org/2000/svg">\n'
+        f'  <circle cx="200" cy="200" r="180" fill="{rng.choice(PALETTE)}"/>\n  {body}\n</svg>\n'
+    )
+
+
+def badge_svg(rng: random.Random) -> str:
+    """Badge-like SVG of roughly 1-4 KB."""
+    body = "\n  ".join(_shapes(rng, rng.randrange(10, 40), 200))
+    return (
+        '<svg width="200" height="200" viewBox="0 0 200 200" xmlns="http://www.w3.org/2000/svg">\n'
+        f'  <rect x="20" y="20" width="160" height="160" rx="32" fill="{rng.choice(PALETTE)}"/>\n  {body}\n</svg>\n'
+    )
+
+
+def build_school(path: Path, spec: SchoolSpec) -> Path:
+    """Write a fresh database for ``spec`` at ``path`` and return the path."""
+    rng = random.Random(spec.seed)
+    avatars = [avatar_svg(rng) for _ in range(min(spec.avatar_variants, max(spec.students, 1)))]
+    badge_icons = [badge_svg(rng) for _ in range(spec.badge_variants)]
+    store = DataStore(path, synchronous="OFF", student_cache_size=0, badge_cache_size=0)
+    try:
+        student_ids = []
+        for index in range(spec.students):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index + 1}"
+            class_name = f"Klasse {index % max(spec.classes, 1) + 1}"
+            student_ids.append(store.add_student(name, avatars[index % len(avatars)], class_name).student_id)
+        rewards = store.ensure_default_rewards()
+        for start in range(0, len(student_ids), CHUNK):
+            chunk = student_ids[start : start + CHUNK]
+            for reward in rewards:
+                store.bulk_grant_xp(rng.sample(chunk, len(chunk) // 2), reward.xp_amount, reward.reward_id)
+        remaining = spec.badges
+        while remaining > 0 and student_ids:
+            batch = []
+            for _ in range(min(CHUNK, remaining)):
+                variant = rng.randrange(len(badge_icons))
+                batch.append(
+                    BadgeOp(
+                        rng.choice(student_ids),
+                        f"{BADGE_NAMES[variant % len(BADGE_NAMES)]} {variant + 1}",
+                        "Für besondere Leistungen im Unterricht verliehen.",
+                        badge_icons[variant],
+                    )
+                )
+            store.apply_batch(batch)
+            remaining -= len(batch)
+    finally:
+        store.close()
+    return path
+
+
+def school_db(spec: SchoolSpec, directory: Optional[Path] = None) -> Path:
+    """Return a cached database for ``spec``, generating it on first use."""
+    directory = Path(directory or Path(tempfile.gettempdir()) / "classquest-bench")
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / spec.file_name
+    if target.exists():
+        with closing(sqlite3.connect(target)) as conn:
+            outdated = schema_version(conn) < SCHEMA_VERSION
+        if outdated:
+            # Migrate a database cached by an older checkout before anything is timed.
+            DataStore(target).close()
+        return target
+    partial = target.with_suffix(".partial")
+    for leftover in (partial, Path(f"{partial}-wal"), Path(f"{partial}-shm")):
+        leftover.unlink(missing_ok=True)
+    build_school(partial, spec)
+    os.replace(partial, target)
+    return target
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="school")
+    parser.add_argument("--dir", type=Path, default=None, help="cache directory for generated databases")
+    args = parser.parse_args(argv)
+    print(school_db(PRESETS[args.preset], args.dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Columnar roster snapshots for class analytics.
+
+A :class:`RosterSnapshot` keeps student ID, XP, level, badge count and class
+of every student in parallel typed vectors instead of ``Student`` objects, so
+histograms, percentiles and per-class sums run over plain numbers. NumPy is
+used when it is installed; otherwise the vectors are :mod:`array` arrays and
+the aggregates fall back to pure Python with the same results.
+
+Snapshots are not thread-safe: patch and read them from one thread at a time.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the array module gives the same results, only slower.
+    np = None
+
+COLUMNS = ("student_id", "xp", "level", "badge_count")
+
+
+def _vector(values: List[int]) -> Any:
+    return np.array(values, dtype=np.int64) if np is not None else array("q", values)
+
+
+def _extend(vector: Any, values: List[int]) -> Any:
+    if np is not None:
+        return np.concatenate((vector, np.array(values, dtype=np.int64)))
+    vector.extend(values)
+    return vector
+
+
+class RosterSnapshot:
+    """Array-backed copy of the roster's numeric columns.
+
+    Build one with :meth:`DataStore.roster_snapshot` and keep it current with
+    :meth:`DataStore.refresh_roster_snapshot`, which patches only the rows
+    named by a change event. Rows stay in insertion order; ``class_code``
+    indexes :attr:`class_names`.
+    """
+
+    __slots__ = ("student_id", "xp", "level", "badge_count", "class_code", "class_names", "_class_codes", "_positions")
+
+    def __init__(self, rows: Iterable[Mapping[str, Any]] = ()) -> None:
+        self.class_names: List[Optional[str]] = []
+        self._class_codes: Dict[Optional[str], int] = {}
+        self._positions: Dict[int, int] = {}
+        columns = self._split(rows)
+        for name, values in columns.items():
+            setattr(self, name, _vector(values))
+        self._positions = {student_id: position for position, student_id in enumerate(columns["student_id"])}
+
+    def _class_code(self, class_name: Optional[str]) -> int:
+        code = self._class_codes.get(class_name)
+        if code is None:
+            code = self._class_codes[class_name] = len(self.class_names)
+            self.class_names.append(class_name)
+        return code
+
+    def _split(self, rows: Iterable[Mapping[str, Any]]) -> Dict[str, List[int]]:
+        columns: Dict[str, List[int]] = {name: [] for name in (*COLUMNS, "class_code")}
+        for row in rows:
+            for name in COLUMNS:
+                columns[name].append(row[name])
+            columns["class_code"].append(self._class_code(row["class_name"]))
+        return columns
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if np is not None else "array"
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, student_id: int) -> bool:
+        return student_id in self._positions
+
+    def patch(self, rows: Iterable[Mapping[str, Any]]) -> int:
+        """Overwrite the rows of known students and append new ones; returns the row count."""
+        columns = self._split(rows)
+        positions = [self._positions.get(student_id) for student_id in columns["student_id"]]
+        updated = [index for index, position in enumerate(positions) if position is not None]
+        added = [index for index, position in enumerate(positions) if position is None]
+        names = (*COLUMNS[1:], "class_code")
+        if updated:
+            targets = [positions[index] for index in updated]
+            for name in names:
+                vector, values = getattr(self, name), [columns[name][index] for index in updated]
+                if np is not None:
+                    vector[targets] = values
+                else:
+                    for target, value in zip(targets, values):
+                        vector[target] = value
+        if added:
+            for name in (*names, "student_id"):
+                setattr(self, name, _extend(getattr(self, name), [columns[name][index] for index in added]))
+            start = len(self._positions)
+            for offset, index in enumerate(added):
+                self._positions[columns["student_id"][index]] = start + offset
+        return len(positions)
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+    def _column(self, name: str) -> Any:
+        if name not in COLUMNS[1:]:
+            raise ValueError(f"Unknown roster column: {name}")
+        return getattr(self, name)
+
+    def total(self, column: str) -> int:
+        return int(self._column(column).sum()) if np is not None else sum(self._column(column))
+
+    def mean(self, column: str) -> float:
+        return self.total(column) / len(self) if len(self) else 0.0
+
+    def percentiles(self, column: str, percents: Sequence[float] = (25, 50, 75)) -> List[float]:
+        """Percentiles of ``column`` with linear interpolation, like ``numpy.percentile``."""
+        if not len(self):
+            return [0.0 for _ in percents]
+        if np is not None:
+            return [float(value) for value in np.percentile(self._column(column), percents)]
+        ordered = sorted(self._column(column))
+        results = []
+        for percent in percents:
+            position = percent / 100 * (len(ordered) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(ordered) - 1)
+            results.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
+        return [float(value) for value in results]
+
+    def distribution(self, column: str, bucket_width: int = 1) -> List[Tuple[int, int]]:
+        """``(bucket start, count)`` for every non-empty bucket of ``bucket_width``, ascending."""
+        if bucket_width < 1:
+            raise ValueError("bucket_width must be positive")
+        if not len(self):
+            return []
+        if np is not None:
+            buckets = self._column(column) // bucket_width
+            offset = int(buckets.min())
+            counts = np.bincount(buckets - offset)
+            return [((offset + int(index)) * bucket_width, int(counts[index])) for index in np.flatnonzero(counts)]
+        counts = Counter(value // bucket_width for value in self._column(column))
+        return [(bucket * bucket_width, count) for bucket, count in sorted(counts.items())]
+
+    def class_sizes(self) -> Dict[Optional[str], int]:
+        if np is not None:
+            counts = np.bincount(self.class_code, minlength=len(self.class_names))
+            return {name: int(count) for name, count in zip(self.class_names, counts) if count}
+        counts = Counter(self.class_code)
+        return {self.class_names[code]: count for code, count in counts.items()}
+
+    def class_sums(self, column: str) -> Dict[Optional[str], int]:
+        values = self._column(column)
+        if np is not None:
+            sums = np.zeros(len(self.class_names), dtype=np.int64)
+            np.add.at(sums, self.class_code, values)
+            sizes = np.bincount(self.class_code, minlength=len(self.class_names))
+            return {name: int(total) for name, total, size in zip(self.class_names, sums, sizes) if size}
+        sums: Dict[Optional[str], int] = {}
+        for code, value in zip(self.class_code, values):
+            name = self.class_names[code]
+            sums[name] = sums.get(name, 0) + value
+        return sums
+
+    def class_means(self, column: str) -> Dict[Optional[str], float]:
+        sizes = self.class_sizes()
+        return {name: total / sizes[name] for name, total in self.class_sums(column).items()}
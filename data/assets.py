@@ -0,0 +1,30 @@
+"""Content-addressed storage helpers for SVG assets."""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Dict, Optional
+
+
+def content_hash(svg: str) -> str:
+    """Return the key under which ``svg`` is stored in the ``assets`` table."""
+    return hashlib.sha256(svg.encode("utf-8")).hexdigest()
+
+
+class AssetCache:
+    """Interns SVG documents by content hash so equal assets share one string."""
+
+    def __init__(self) -> None:
+        self._by_hash: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, asset_hash: str) -> Optional[str]:
+        return self._by_hash.get(asset_hash)
+
+    def put(self, asset_hash: str, svg: str) -> str:
+        """Remember ``svg`` and return the canonical string for its hash."""
+        with self._lock:
+            return self._by_hash.setdefault(asset_hash, svg)
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
@@ -0,0 +1,105 @@
+"""Group commit: coalesce bursts of small writes into one transaction."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .store import DataStore
+
+
+@dataclass(frozen=True, slots=True)
+class GrantOp:
+    """Queued ``bulk_grant_xp`` call."""
+
+    student_ids: Tuple[int, ...]
+    amount: int
+    reward_id: Optional[int] = None
+
+
+@dataclass(frozen=True, slots=True)
+class BadgeOp:
+    """Queued ``award_badge`` call."""
+
+    student_id: int
+    name: str
+    description: str
+    svg_icon: str
+
+
+BatchOp = Union[GrantOp, BadgeOp]
+
+
+class WriteBatcher:
+    """Buffers write operations and flushes them as a single transaction.
+
+    A flush happens ``window`` seconds after the first queued operation or as
+    soon as ``max_ops`` operations are waiting, whichever comes first. Flushes
+    run on a timer thread, so queueing never blocks the caller. Each operation
+    still succeeds or fails on its own; only the commit is shared.
+    """
+
+    def __init__(self, store: "DataStore", window: float = 0.05, max_ops: int = 32) -> None:
+        self._store = store
+        self.window = max(window, 0.0)
+        self.max_ops = max(max_ops, 1)
+        self._pending: List[Tuple[BatchOp, Future]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+    def submit(self, op: BatchOp) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBatcher is closed")
+            self._pending.append((op, future))
+            if len(self._pending) >= self.max_ops:
+                self._schedule(0.0)
+            elif self._timer is None:
+                self._schedule(self.window)
+        return future
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> None:
+        """Write everything queued so far and resolve the matching futures."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            batch = [(op, future) for op, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                return
+            try:
+                results = self._store.apply_batch([op for op, _ in batch])
+            except BaseException as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                raise
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """Flush pending writes and refuse new ones."""
+        with self._lock:
+            self._closed = True
+        self.flush()
+
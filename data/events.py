@@ -0,0 +1,104 @@
+"""Typed change notifications published by :class:`DataStore` after each commit."""
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Set, Tuple, Union
+
+
+@dataclass(frozen=True, slots=True)
+class StudentAdded:
+    student_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StudentUpdated:
+    """Name, avatar, class or XP of existing students changed."""
+
+    student_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class BulkGrant:
+    """``amount`` XP were granted to every student in ``student_ids``."""
+
+    student_ids: Tuple[int, ...]
+    amount: int
+    reward_id: Optional[int] = None
+
+
+@dataclass(frozen=True, slots=True)
+class BadgeAwarded:
+    badge_ids: Tuple[int, ...]
+    student_ids: Tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class RewardAdded:
+    reward_ids: Tuple[int, ...]
+
+
+ChangeEvent = Union[StudentAdded, StudentUpdated, BulkGrant, BadgeAwarded, RewardAdded]
+Subscriber = Callable[[ChangeEvent], None]
+
+
+@dataclass(slots=True)
+class ChangeSet:
+    """Union of the IDs touched by a run of events, for targeted refreshes."""
+
+    added_student_ids: Set[int] = field(default_factory=set)
+    student_ids: Set[int] = field(default_factory=set)
+    badge_ids: Set[int] = field(default_factory=set)
+    reward_ids: Set[int] = field(default_factory=set)
+
+    @classmethod
+    def from_events(cls, events: Iterable[ChangeEvent]) -> "ChangeSet":
+        changes = cls()
+        for event in events:
+            if isinstance(event, StudentAdded):
+                changes.added_student_ids.update(event.student_ids)
+            elif isinstance(event, (StudentUpdated, BulkGrant)):
+                changes.student_ids.update(event.student_ids)
+            elif isinstance(event, BadgeAwarded):
+                changes.badge_ids.update(event.badge_ids)
+                # The denormalized badge count of these students changed too.
+                changes.student_ids.update(event.student_ids)
+            elif isinstance(event, RewardAdded):
+                changes.reward_ids.update(event.reward_ids)
+        return changes
+
+    def __bool__(self) -> bool:
+        return bool(self.added_student_ids or self.student_ids or self.badge_ids or self.reward_ids)
+
+
+class ChangeBus:
+    """Synchronous publish/subscribe hub for :data:`ChangeEvent` objects.
+
+    Subscribers run on the thread that committed the change, so they must be
+    quick and thread-safe; UI code should hop to its own thread first. A
+    failing subscriber is reported through ``sys.excepthook`` and does not
+    keep the others from being notified.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Register ``callback`` and return a function that unregisters it."""
+        with self._lock:
+            self._subscribers = [*self._subscribers, callback]
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not callback]
+
+        return unsubscribe
+
+    def publish(self, event: ChangeEvent) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as error:  # noqa: BLE001 - one bad subscriber must not block the rest
+                sys.excepthook(type(error), error, error.__traceback__)
@@ -0,0 +1,345 @@
+"""Opt-in timing of DataStore calls, SQL statements, commits and UI work.
+
+Nothing is measured unless :func:`enable` is called: the store's methods are
+wrapped per instance while instrumentation is active and restored by
+:func:`disable`. What stays in place when it is off costs next to nothing:
+:class:`TimedConnection` checks for a commit observer on every commit, and
+:func:`ui_timed` methods check whether instrumentation is active per call.
+
+Python's ``sqlite3`` module has no per-statement profiling hook. Statement
+durations are therefore measured from the trace callback: a statement's time
+runs until the next statement in the same store call starts, or until the call
+returns. That includes the Python work in between (row hydration), which is
+what a stalled UI actually waits for.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from .store import DataStore
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAX_SQL_LENGTH = 500
+
+
+@dataclass(slots=True)
+class TimingStats:
+    """Running totals for one instrumented operation."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+
+    def add(self, duration_ms: float, rows: int = 0) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.rows += rows
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.mean_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SlowQuery:
+    method: str
+    sql: str
+    duration_ms: float
+    at: datetime
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "sql": self.sql,
+            "duration_ms": round(self.duration_ms, 3),
+            "at": self.at.isoformat(timespec="milliseconds"),
+        }
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose commits (including the fsync) can be timed.
+
+    Both explicit :meth:`commit` calls and ``with connection:`` blocks are
+    timed. With no observer set they behave exactly like the base class.
+    """
+
+    commit_observer: Optional[Callable[[float], None]] = None
+
+    def commit(self) -> None:
+        observer = self.commit_observer
+        if observer is None:
+            return super().commit()
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            observer((time.perf_counter() - started) * 1000)
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> Any:
+        # The C implementation commits directly rather than through commit().
+        observer = self.commit_observer
+        if observer is None or exc_type is not None:
+            return super().__exit__(exc_type, exc, tb)
+        started = time.perf_counter()
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            observer((time.perf_counter() - started) * 1000)
+
+
+class _Span:
+    __slots__ = ("method", "statement", "statement_started")
+
+    def __init__(self, method: str) -> None:
+        self.method = method
+        self.statement: Optional[str] = None
+        self.statement_started = 0.0
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple, dict, set, frozenset)):
+        return len(result)
+    return 1
+
+
+class Instrumentation:
+    """Collects timings for one :class:`DataStore` and the UI built on it.
+
+    Calls, rows, commits and UI spans are aggregated per name. Statements
+    slower than ``slow_query_ms`` are kept in a bounded log, newest last.
+    """
+
+    def __init__(self, slow_query_ms: float = 50.0, max_slow_queries: int = 200) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.started_at = datetime.now(timezone.utc)
+        self.methods: Dict[str, TimingStats] = {}
+        self.ui: Dict[str, TimingStats] = {}
+        self.commits = TimingStats()
+        self.slow_queries: Deque[SlowQuery] = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._store: Optional["DataStore"] = None
+
+    # ------------------------------------------------------------------
+    # Installation
+    # ------------------------------------------------------------------
+    def install(self, store: "DataStore") -> None:
+        """Wrap every public method of ``store`` and hook its connections."""
+        if self._store is not None:
+            raise RuntimeError("Instrumentation is already installed")
+        self._store = store
+        for name in _public_methods(type(store)):
+            setattr(store, name, self._wrap(name, getattr(store, name)))
+        store._reading = self._traced_reading(store._reading)  # type: ignore[method-assign]
+        with store._write_lock:
+            store._connection.set_trace_callback(self._on_statement)
+            if isinstance(store._connection, TimedConnection):
+                store._connection.commit_observer = self._on_commit
+
+    def uninstall(self) -> None:
+        store, self._store = self._store, None
+        if store is None:
+            return
+        for name in [*_public_methods(type(store)), "_reading"]:
+            store.__dict__.pop(name, None)
+        with store._write_lock:
+            store._connection.set_trace_callback(None)
+            if isinstance(store._connection, TimedConnection):
+                store._connection.commit_observer = None
+
+    def _wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            stack = self._spans()
+            span = _Span(name)
+            stack.append(span)
+            started = time.perf_counter()
+            rows = 0
+            try:
+                result = method(*args, **kwargs)
+                rows = _row_count(result)
+                return result
+            finally:
+                now = time.perf_counter()
+                self._finish_statement(span, now)
+                stack.pop()
+                with self._lock:
+                    self.methods.setdefault(name, TimingStats()).add((now - started) * 1000, rows)
+
+        return timed
+
+    def _traced_reading(self, reading: Callable[[], Any]) -> Callable[[], Any]:
+        @contextmanager
+        def traced() -> Iterator[sqlite3.Connection]:
+            with reading() as connection:
+                if connection is self._store._connection:  # type: ignore[union-attr]
+                    yield connection
+                    return
+                connection.set_trace_callback(self._on_statement)
+                try:
+                    yield connection
+                finally:
+                    connection.set_trace_callback(None)
+
+        return traced
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def _spans(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _on_statement(self, sql: str) -> None:
+        stack = self._spans()
+        if not stack:
+            return  # Internal work outside any public call, e.g. reader setup.
+        span = stack[-1]
+        now = time.perf_counter()
+        self._finish_statement(span, now)
+        span.statement = sql
+        span.statement_started = now
+
+    def _finish_statement(self, span: _Span, now: float) -> None:
+        if span.statement is None:
+            return
+        duration_ms = (now - span.statement_started) * 1000
+        if duration_ms >= self.slow_query_ms:
+            sql = " ".join(span.statement.split())[:MAX_SQL_LENGTH]
+            entry = SlowQuery(span.method, sql, duration_ms, datetime.now(timezone.utc))
+            with self._lock:
+                self.slow_queries.append(entry)
+        span.statement = None
+
+    def _on_commit(self, duration_ms: float) -> None:
+        with self._lock:
+            self.commits.add(duration_ms)
+
+    def record_ui(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            self.ui.setdefault(name, TimingStats()).add(duration_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.methods.clear()
+            self.ui.clear()
+            self.commits = TimingStats()
+            self.slow_queries.clear()
+            self.started_at = datetime.now(timezone.utc)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "slow_query_ms": self.slow_query_ms,
+                "database": str(self._store.db_path) if self._store is not None else None,
+                "methods": {name: stats.as_dict() for name, stats in sorted(self.methods.items())},
+                "commits": self.commits.as_dict(),
+                "ui": {name: stats.as_dict() for name, stats in sorted(self.ui.items())},
+                "slow_queries": [entry.as_dict() for entry in self.slow_queries],
+            }
+
+    def export_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        return path
+
+
+def _public_methods(cls: type) -> List[str]:
+    return [
+        name
+        for name, value in vars(cls).items()
+        if not name.startswith("_") and callable(value) and not isinstance(value, (staticmethod, classmethod, type))
+        and name != "close"
+    ]
+
+
+# ----------------------------------------------------------------------
+# Process-wide switch
+# ----------------------------------------------------------------------
+_active: Optional[Instrumentation] = None
+
+
+def active() -> Optional[Instrumentation]:
+    return _active
+
+
+def enable(store: "DataStore", slow_query_ms: float = 50.0) -> Instrumentation:
+    """Start instrumenting ``store`` and the UI; returns the collector."""
+    global _active
+    if _active is not None:
+        _active.slow_query_ms = slow_query_ms
+        return _active
+    instrumentation = Instrumentation(slow_query_ms)
+    instrumentation.install(store)
+    _active = instrumentation
+    return instrumentation
+
+
+def disable() -> None:
+    global _active
+    instrumentation, _active = _active, None
+    if instrumentation is not None:
+        instrumentation.uninstall()
+
+
+def ui_timed(name: str) -> Callable[[F], F]:
+    """Decorator recording how long a UI method takes while instrumentation is on."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            instrumentation = _active
+            if instrumentation is None:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                instrumentation.record_ui(name, (time.perf_counter() - started) * 1000)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def ui_started() -> Optional[float]:
+    """Start an asynchronous UI timing; ``None`` while instrumentation is off."""
+    return time.perf_counter() if _active is not None else None
+
+
+def ui_finished(name: str, started: Optional[float]) -> None:
+    instrumentation = _active
+    if started is not None and instrumentation is not None:
+        instrumentation.record_ui(name, (time.perf_counter() - started) * 1000)
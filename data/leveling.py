@@ -0,0 +1,86 @@
+"""Level curves: how much XP each level needs.
+
+A :class:`LevelCurve` is a precomputed, strictly increasing table of the XP at
+which each level starts, so the level for an XP total and the progress towards
+the next level are a single bisection. Linear and quadratic curves are built
+from a formula up to ``max_level``; custom curves pass the table directly.
+The store keeps the active curve in the ``level_curve`` table so SQL can
+compute levels set-based as well.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+DEFAULT_MAX_LEVEL = 10_000
+
+
+@dataclass(frozen=True, slots=True)
+class LevelProgress:
+    """Position of an XP total within its level; ``xp_for_level`` is ``None`` at the top."""
+
+    level: int
+    xp_into_level: int
+    xp_for_level: Optional[int]
+
+    @property
+    def xp_to_next(self) -> Optional[int]:
+        return None if self.xp_for_level is None else self.xp_for_level - self.xp_into_level
+
+    @property
+    def fraction(self) -> float:
+        return 1.0 if self.xp_for_level is None else self.xp_into_level / self.xp_for_level
+
+
+class LevelCurve:
+    """XP thresholds per level; ``thresholds[0]`` (level 1) is always 0."""
+
+    __slots__ = ("thresholds",)
+
+    def __init__(self, thresholds: Sequence[int]) -> None:
+        thresholds = tuple(int(value) for value in thresholds)
+        if not thresholds or thresholds[0] != 0:
+            raise ValueError("A level curve must start at 0 XP")
+        if any(later <= earlier for earlier, later in zip(thresholds, thresholds[1:])):
+            raise ValueError("Level thresholds must be strictly increasing")
+        self.thresholds: Tuple[int, ...] = thresholds
+
+    @classmethod
+    def linear(cls, xp_per_level: int = 100, max_level: int = DEFAULT_MAX_LEVEL) -> "LevelCurve":
+        return cls([xp_per_level * index for index in range(max_level)])
+
+    @classmethod
+    def quadratic(cls, factor: int = 25, max_level: int = DEFAULT_MAX_LEVEL) -> "LevelCurve":
+        """Level ``n`` starts at ``factor * (n - 1) ** 2`` XP, so each level takes longer."""
+        return cls([factor * index * index for index in range(max_level)])
+
+    @classmethod
+    def table(cls, thresholds: Sequence[int]) -> "LevelCurve":
+        return cls(thresholds)
+
+    @property
+    def max_level(self) -> int:
+        return len(self.thresholds)
+
+    def level_for(self, xp: int) -> int:
+        return max(bisect_right(self.thresholds, xp), 1)
+
+    def progress(self, xp: int) -> LevelProgress:
+        level = self.level_for(xp)
+        start = self.thresholds[level - 1]
+        span = self.thresholds[level] - start if level < self.max_level else None
+        return LevelProgress(level, xp - start, span)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LevelCurve) and self.thresholds == other.thresholds
+
+    def __hash__(self) -> int:
+        return hash(self.thresholds)
+
+    def __repr__(self) -> str:
+        preview = ", ".join(map(str, self.thresholds[:5]))
+        return f"LevelCurve([{preview}, …], max_level={self.max_level})"
+
+
+DEFAULT_LEVEL_CURVE = LevelCurve.linear()
@@ -0,0 +1,457 @@
+"""Versioned schema migrations keyed on ``PRAGMA user_version``.
+
+Each entry in :data:`MIGRATIONS` moves the schema one version forward and runs
+in its own transaction, so existing ``classquest.db`` files are evolved in
+place and an interrupted upgrade leaves the previous version intact.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from typing import Callable, List
+
+from .assets import content_hash
+from .leveling import DEFAULT_LEVEL_CURVE
+from .models import DEFAULT_MILESTONE_STEP
+from .svg_ingest import SvgRejected, ingest_svg
+from .timestamps import to_epoch_micros
+
+BASE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS students (
+        student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        display_name TEXT NOT NULL,
+        avatar_svg TEXT NOT NULL,
+        xp INTEGER NOT NULL DEFAULT 0,
+        level INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS badges (
+        badge_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        svg_icon TEXT NOT NULL,
+        awarded_at TEXT NOT NULL,
+        FOREIGN KEY(student_id) REFERENCES students(student_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rewards (
+        reward_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        label TEXT NOT NULL,
+        xp_amount INTEGER NOT NULL,
+        color_role TEXT NOT NULL,
+        description TEXT
+    )
+    """,
+)
+
+
+def _iso_to_micros(value: str | int) -> int:
+    if isinstance(value, int):
+        return value
+    return to_epoch_micros(datetime.fromisoformat(value))
+
+
+def _index_badges_by_student(conn: sqlite3.Connection) -> None:
+    """Store ``awarded_at`` as epoch microseconds and index it per student."""
+    conn.create_function("cq_iso_to_micros", 1, _iso_to_micros, deterministic=True)
+    conn.execute(
+        """
+        CREATE TABLE badges_v1 (
+            badge_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            svg_icon TEXT NOT NULL,
+            awarded_at INTEGER NOT NULL,
+            FOREIGN KEY(student_id) REFERENCES students(student_id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO badges_v1(badge_id, student_id, name, description, svg_icon, awarded_at)
+        SELECT badge_id, student_id, name, description, svg_icon, cq_iso_to_micros(awarded_at)
+        FROM badges
+        """
+    )
+    conn.execute("DROP TABLE badges")
+    conn.execute("ALTER TABLE badges_v1 RENAME TO badges")
+    conn.execute("CREATE INDEX idx_badges_student_awarded ON badges(student_id, awarded_at)")
+
+
+def _deduplicate_svg_assets(conn: sqlite3.Connection) -> None:
+    """Move inline SVG documents into a shared ``assets`` table keyed by hash."""
+    conn.create_function("cq_content_hash", 1, content_hash, deterministic=True)
+    conn.execute(
+        """
+        CREATE TABLE assets (
+            asset_hash TEXT PRIMARY KEY,
+            svg TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO assets(asset_hash, svg)
+        SELECT cq_content_hash(avatar_svg), avatar_svg FROM students
+        UNION
+        SELECT cq_content_hash(svg_icon), svg_icon FROM badges
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE students_v2 (
+            student_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            display_name TEXT NOT NULL,
+            avatar_hash TEXT NOT NULL REFERENCES assets(asset_hash),
+            xp INTEGER NOT NULL DEFAULT 0,
+            level INTEGER NOT NULL DEFAULT 1
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO students_v2(student_id, display_name, avatar_hash, xp, level)
+        SELECT student_id, display_name, cq_content_hash(avatar_svg), xp, level FROM students
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE badges_v2 (
+            badge_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(student_id),
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            icon_hash TEXT NOT NULL REFERENCES assets(asset_hash),
+            awarded_at INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO badges_v2(badge_id, student_id, name, description, icon_hash, awarded_at)
+        SELECT badge_id, student_id, name, description, cq_content_hash(svg_icon), awarded_at
+        FROM badges
+        """
+    )
+    conn.execute("DROP TABLE badges")
+    conn.execute("DROP TABLE students")
+    conn.execute("ALTER TABLE students_v2 RENAME TO students")
+    conn.execute("ALTER TABLE badges_v2 RENAME TO badges")
+    conn.execute("CREATE INDEX idx_badges_student_awarded ON badges(student_id, awarded_at)")
+
+
+def _denormalize_badge_count(conn: sqlite3.Connection) -> None:
+    """Keep per-student badge counts and index badges by award time for listings."""
+    conn.execute("ALTER TABLE students ADD COLUMN badge_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        UPDATE students
+        SET badge_count = (SELECT COUNT(*) FROM badges WHERE badges.student_id = students.student_id)
+        """
+    )
+    conn.execute("CREATE INDEX idx_badges_awarded ON badges(awarded_at)")
+    conn.execute(
+        """
+        CREATE TRIGGER trg_badges_count_insert AFTER INSERT ON badges BEGIN
+            UPDATE students SET badge_count = badge_count + 1 WHERE student_id = NEW.student_id;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_badges_count_delete AFTER DELETE ON badges BEGIN
+            UPDATE students SET badge_count = badge_count - 1 WHERE student_id = OLD.student_id;
+        END
+        """
+    )
+
+
+def _add_xp_ledger(conn: sqlite3.Connection) -> None:
+    """Record every XP change in ``xp_events`` and roll it up per day and week.
+
+    Rollups are maintained by trigger on insert. Periods are keyed by their
+    first UTC day since the epoch; weeks start on Monday (epoch day 0 was a
+    Thursday). XP earned before this migration stays in ``students.xp`` only.
+    """
+    conn.execute(
+        """
+        CREATE TABLE xp_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL REFERENCES students(student_id),
+            reward_id INTEGER REFERENCES rewards(reward_id),
+            amount INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_xp_events_student_created ON xp_events(student_id, created_at)")
+    conn.execute(
+        """
+        CREATE TABLE xp_rollups (
+            period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+            period_start INTEGER NOT NULL,
+            student_id INTEGER NOT NULL REFERENCES students(student_id),
+            xp INTEGER NOT NULL,
+            grants INTEGER NOT NULL,
+            PRIMARY KEY (period, period_start, student_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE xp_period_totals (
+            period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+            period_start INTEGER NOT NULL,
+            xp INTEGER NOT NULL,
+            grants INTEGER NOT NULL,
+            PRIMARY KEY (period, period_start)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_xp_events_rollup AFTER INSERT ON xp_events BEGIN
+            INSERT INTO xp_rollups(period, period_start, student_id, xp, grants)
+            VALUES
+                ('day', NEW.created_at / 86400000000, NEW.student_id, NEW.amount, 1),
+                ('week', NEW.created_at / 86400000000 - (NEW.created_at / 86400000000 + 3) % 7,
+                 NEW.student_id, NEW.amount, 1)
+            ON CONFLICT (period, period_start, student_id)
+            DO UPDATE SET xp = xp + excluded.xp, grants = grants + 1;
+
+            INSERT INTO xp_period_totals(period, period_start, xp, grants)
+            VALUES
+                ('day', NEW.created_at / 86400000000, NEW.amount, 1),
+                ('week', NEW.created_at / 86400000000 - (NEW.created_at / 86400000000 + 3) % 7,
+                 NEW.amount, 1)
+            ON CONFLICT (period, period_start)
+            DO UPDATE SET xp = xp + excluded.xp, grants = grants + 1;
+        END
+        """
+    )
+
+
+def _add_leaderboard_indexes(conn: sqlite3.Connection) -> None:
+    """Add an optional class per student and index XP order for leaderboards."""
+    conn.execute("ALTER TABLE students ADD COLUMN class_name TEXT")
+    conn.execute("CREATE INDEX idx_students_xp ON students(xp DESC, student_id)")
+    conn.execute("CREATE INDEX idx_students_class_xp ON students(class_name, xp DESC, student_id)")
+
+
+def _ingest_svg_assets(conn: sqlite3.Connection) -> None:
+    """Minify stored SVGs and record their size and render cost.
+
+    Documents that no longer pass validation are kept verbatim with a NULL
+    render cost, so existing students and badges keep their pictures.
+    """
+    conn.execute("ALTER TABLE assets ADD COLUMN byte_size INTEGER")
+    conn.execute("ALTER TABLE assets ADD COLUMN render_cost INTEGER")
+    conn.execute("CREATE TEMP TABLE asset_remap (old_hash TEXT PRIMARY KEY, new_hash TEXT NOT NULL) WITHOUT ROWID")
+    for old_hash, svg in conn.execute("SELECT asset_hash, svg FROM assets").fetchall():
+        try:
+            asset = ingest_svg(svg)
+        except SvgRejected:
+            conn.execute("UPDATE assets SET byte_size = ? WHERE asset_hash = ?", (len(svg.encode("utf-8")), old_hash))
+            continue
+        new_hash = content_hash(asset.svg)
+        conn.execute(
+            """
+            INSERT INTO assets(asset_hash, svg, byte_size, render_cost) VALUES (?, ?, ?, ?)
+            ON CONFLICT (asset_hash) DO UPDATE SET byte_size = excluded.byte_size, render_cost = excluded.render_cost
+            """,
+            (new_hash, asset.svg, asset.byte_size, asset.render_cost),
+        )
+        if new_hash != old_hash:
+            conn.execute("INSERT INTO asset_remap(old_hash, new_hash) VALUES (?, ?)", (old_hash, new_hash))
+    conn.execute(
+        "UPDATE students SET avatar_hash = m.new_hash FROM asset_remap AS m WHERE students.avatar_hash = m.old_hash"
+    )
+    conn.execute("UPDATE badges SET icon_hash = m.new_hash FROM asset_remap AS m WHERE badges.icon_hash = m.old_hash")
+    conn.execute("DELETE FROM assets WHERE asset_hash IN (SELECT old_hash FROM asset_remap)")
+    conn.execute("DROP TABLE asset_remap")
+
+
+def _add_badge_rule_keys(conn: sqlite3.Connection) -> None:
+    """Remember which rule awarded a badge so each rule fires once per student."""
+    conn.execute("ALTER TABLE badges ADD COLUMN rule_key TEXT")
+    conn.execute("CREATE UNIQUE INDEX idx_badges_rule ON badges(student_id, rule_key) WHERE rule_key IS NOT NULL")
+
+
+def _add_level_curve(conn: sqlite3.Connection) -> None:
+    """Store the XP threshold of every level so SQL can look levels up by index.
+
+    The table starts as the former fixed curve of 100 XP per level.
+    """
+    conn.execute("CREATE TABLE level_curve (level INTEGER PRIMARY KEY, min_xp INTEGER NOT NULL UNIQUE)")
+    conn.executemany(
+        "INSERT INTO level_curve(level, min_xp) VALUES (?, ?)",
+        enumerate(DEFAULT_LEVEL_CURVE.thresholds, start=1),
+    )
+
+
+def _add_class_progress(conn: sqlite3.Connection) -> None:
+    """Keep the roster's XP total in a single row, updated by delta on every XP change."""
+    conn.execute(
+        """
+        CREATE TABLE class_progress (
+            progress_id INTEGER PRIMARY KEY CHECK (progress_id = 1),
+            total_xp INTEGER NOT NULL,
+            milestone_step INTEGER NOT NULL CHECK (milestone_step > 0)
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO class_progress(progress_id, total_xp, milestone_step) SELECT 1, COALESCE(SUM(xp), 0), ? "
+        "FROM students",
+        (DEFAULT_MILESTONE_STEP,),
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_class_progress_insert AFTER INSERT ON students WHEN NEW.xp != 0 BEGIN
+            UPDATE class_progress SET total_xp = total_xp + NEW.xp WHERE progress_id = 1;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_class_progress_update AFTER UPDATE OF xp ON students WHEN NEW.xp != OLD.xp BEGIN
+            UPDATE class_progress SET total_xp = total_xp + NEW.xp - OLD.xp WHERE progress_id = 1;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_class_progress_delete AFTER DELETE ON students WHEN OLD.xp != 0 BEGIN
+            UPDATE class_progress SET total_xp = total_xp - OLD.xp WHERE progress_id = 1;
+        END
+        """
+    )
+
+
+# Distinct badge names and descriptions of NEW/OLD.student_id, as one FTS column value.
+_BADGE_TEXT = """
+    (SELECT COALESCE(group_concat(text, ' '), '') FROM (
+        SELECT name AS text FROM badges WHERE student_id = {row}.student_id
+        UNION SELECT description FROM badges WHERE student_id = {row}.student_id))
+"""
+
+
+def _add_search_index(conn: sqlite3.Connection) -> None:
+    """Index student names and their badges for diacritic-insensitive prefix search.
+
+    ``roster_search`` holds one FTS5 document per student (rowid = student_id)
+    with the name and the distinct badge names and descriptions. Badge
+    triggers skip awards that repeat a name and description the student
+    already has. SQLite builds without FTS5 get no index; the store then
+    searches with ``LIKE`` instead.
+    """
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE roster_search USING fts5(
+                display_name, badge_text, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return  # No FTS5 module in this SQLite build.
+    conn.execute(
+        f"""
+        INSERT INTO roster_search(rowid, display_name, badge_text)
+        SELECT student_id, display_name, {_BADGE_TEXT.format(row="students")} FROM students
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_roster_search_insert AFTER INSERT ON students BEGIN
+            INSERT INTO roster_search(rowid, display_name, badge_text) VALUES (NEW.student_id, NEW.display_name, '');
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_roster_search_rename AFTER UPDATE OF display_name ON students
+        WHEN NEW.display_name != OLD.display_name BEGIN
+            UPDATE roster_search SET display_name = NEW.display_name WHERE rowid = NEW.student_id;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_roster_search_delete AFTER DELETE ON students BEGIN
+            DELETE FROM roster_search WHERE rowid = OLD.student_id;
+        END
+        """
+    )
+    for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_roster_search_badge_{event.lower()} AFTER {event} ON badges
+            WHEN NOT EXISTS (
+                SELECT 1 FROM badges WHERE student_id = {row}.student_id AND badge_id != {row}.badge_id
+                AND name = {row}.name AND description = {row}.description
+            ) BEGIN
+                UPDATE roster_search SET badge_text = {_BADGE_TEXT.format(row=row)} WHERE rowid = {row}.student_id;
+            END
+            """
+        )
+
+
+def _add_badge_rule_backfills(conn: sqlite3.Connection) -> None:
+    """Record which rules were backfilled and index grant counts per reward.
+
+    A rule is backfilled once, when it is first registered; afterwards grants
+    evaluate it incrementally. The index serves the backfill of
+    ``reward_count`` rules, which counts one reward's grants in a period.
+    """
+    conn.execute("CREATE TABLE badge_rules (rule_key TEXT PRIMARY KEY, backfilled_at INTEGER NOT NULL)")
+    conn.execute("CREATE INDEX idx_xp_events_reward_created ON xp_events(reward_id, created_at)")
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _index_badges_by_student,
+    _deduplicate_svg_assets,
+    _denormalize_badge_count,
+    _add_xp_ledger,
+    _add_leaderboard_indexes,
+    _ingest_svg_assets,
+    _add_badge_rule_keys,
+    _add_level_curve,
+    _add_class_progress,
+    _add_search_index,
+    _add_badge_rule_backfills,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring the database up to :data:`SCHEMA_VERSION` and return the old version."""
+    start = schema_version(conn)
+    if start > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {start} is newer than supported version {SCHEMA_VERSION}"
+        )
+    if start == 0:
+        with conn:
+            for statement in BASE_SCHEMA:
+                conn.execute(statement)
+    for version in range(start + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[version - 1](conn)
+            conn.execute(f"PRAGMA user_version={version}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    return start
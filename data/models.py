@@ -1,9 +1,12 @@
 """Domain models for the ClassQuest desktop application."""
 from __future__ import annotations
 
+from collections import UserList
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Callable, Iterable, List, MutableSequence, Optional
+
+from .leveling import DEFAULT_LEVEL_CURVE, LevelCurve
 
 
 @dataclass(slots=True)
@@ -17,6 +20,36 @@ class Badge:
     awarded_at: datetime
 
 
+class LazyBadgeList(UserList):
+    """Badge list that is only fetched from storage on first access."""
+
+    def __init__(
+        self,
+        initlist: Optional[Iterable[Badge]] = None,
+        loader: Optional[Callable[[], Iterable[Badge]]] = None,
+    ) -> None:
+        self._loader = None if initlist is not None else loader
+        self._data: List[Badge] = list(initlist) if initlist is not None else []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loader is None
+
+    @property
+    def data(self) -> List[Badge]:  # type: ignore[override]
+        loader = self._loader
+        if loader is not None:
+            # Concurrent first accesses may both load; the results are identical.
+            self._data = list(loader())
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, value: List[Badge]) -> None:
+        self._loader = None
+        self._data = value
+
+
 @dataclass(slots=True)
 class Reward:
     """A possible XP reward that can be granted to multiple students."""
@@ -37,13 +70,86 @@ class Student:
     avatar_svg: str
     xp: int = 0
     level: int = 1
-    badges: List[Badge] = field(default_factory=list)
+    badges: MutableSequence[Badge] = field(default_factory=list)
+    class_name: Optional[str] = None
 
-    def add_xp(self, amount: int) -> None:
+    def add_xp(self, amount: int, curve: LevelCurve = DEFAULT_LEVEL_CURVE) -> None:
         if amount < 0:
             raise ValueError("XP amount must be non-negative")
         self.xp += amount
-        self.level = 1 + self.xp // 100
+        self.level = curve.level_for(self.xp)
 
     def award_badge(self, badge: Badge) -> None:
         self.badges.append(badge)
+
+
+@dataclass(slots=True)
+class StudentSummary:
+    """Roster row without avatar or badge payloads."""
+
+    student_id: int
+    display_name: str
+    xp: int
+    level: int
+    badge_count: int
+    class_name: Optional[str] = None
+
+
+@dataclass(slots=True)
+class XpEvent:
+    """One entry of the append-only XP ledger."""
+
+    event_id: int
+    student_id: int
+    reward_id: Optional[int]
+    amount: int
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class XpPeriodTotal:
+    """XP earned during one day or week, read from the rollup tables."""
+
+    period_start: date
+    xp: int
+    grants: int
+
+
+@dataclass(slots=True)
+class LeaderboardEntry:
+    """A student's position on the XP leaderboard; tied students share a rank."""
+
+    rank: int
+    student_id: int
+    display_name: str
+    xp: int
+    level: int
+
+
+DEFAULT_MILESTONE_STEP = 1000
+
+
+@dataclass(slots=True)
+class ClassProgress:
+    """The roster's shared XP total: one star per ``step`` XP, then progress to the next."""
+
+    total_xp: int
+    step: int
+    stars: int
+    step_xp: int
+    remaining_xp: int
+
+    @classmethod
+    def from_total(cls, total_xp: int, step: int = DEFAULT_MILESTONE_STEP) -> "ClassProgress":
+        total_xp = max(total_xp, 0)
+        return cls(
+            total_xp=total_xp,
+            step=step,
+            stars=total_xp // step,
+            step_xp=total_xp % step,
+            remaining_xp=step - total_xp % step,
+        )
+
+    @property
+    def fraction(self) -> float:
+        return self.step_xp / self.step
@@ -0,0 +1,48 @@
+"""Pool of read-only SQLite connections shared between threads."""
+from __future__ import annotations
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class ReaderPool:
+    """Hands out read-only connections, each wrapped in its own read transaction.
+
+    Up to ``size`` idle connections are kept around. When every pooled
+    connection is busy a temporary one is opened instead of blocking, so nested
+    or concurrent reads can never deadlock on the pool.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int = 2) -> None:
+        self._connect = connect
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=max(size, 1))
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            # One snapshot per borrow so multi-query reads stay consistent.
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        except BaseException:
+            conn.close()
+            raise
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
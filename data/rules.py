@@ -0,0 +1,165 @@
+"""Rule-based badge awards evaluated incrementally on every XP grant.
+
+A :class:`BadgeRule` awards a badge once a student's level, XP total or
+number of grants of one reward within a period reaches a threshold. The
+:class:`RuleEngine` keeps rules sorted by threshold per kind, so a grant only
+looks at the thresholds between each affected student's value before and
+after it: evaluating a bulk grant is linear in the number of students.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple
+
+from .models import Reward
+from .timestamps import to_epoch_micros, week_start
+
+RuleKind = Literal["level", "xp", "reward_count"]
+RULE_KINDS = ("level", "xp", "reward_count")
+RULE_PERIODS = ("day", "week", None)
+
+
+@dataclass(frozen=True, slots=True)
+class BadgeRule:
+    """Award ``name`` once ``kind`` reaches ``threshold``.
+
+    ``key`` identifies the rule in the database; each student receives a rule
+    at most once, however often it fires. ``reward_count`` rules count grants
+    of ``reward_id`` in the current UTC ``period`` (``"day"``, Monday-based
+    ``"week"`` or ``None`` for all time) and can be earned once per period.
+    """
+
+    key: str
+    kind: RuleKind
+    threshold: int
+    name: str
+    description: str
+    svg_icon: str
+    reward_id: Optional[int] = None
+    period: Optional[str] = "week"
+
+
+def _first_day(period: str, moment: datetime) -> date:
+    return moment.date() if period == "day" else week_start(moment.date())
+
+
+def period_start(period: Optional[str], moment: datetime) -> int:
+    """Return the start of ``period`` containing ``moment`` in epoch microseconds."""
+    if period is None:
+        return 0
+    return to_epoch_micros(datetime.combine(_first_day(period, moment), time()))
+
+
+def award_key(rule: BadgeRule, moment: datetime) -> str:
+    """Key stored with an award; periodic rules can be earned again each period."""
+    if rule.kind != "reward_count" or rule.period is None:
+        return rule.key
+    return f"{rule.key}@{_first_day(rule.period, moment).isoformat()}"
+
+
+class _ThresholdIndex:
+    """Rules sorted by threshold, queried by the range a value moved through."""
+
+    __slots__ = ("_thresholds", "_rules")
+
+    def __init__(self) -> None:
+        self._thresholds: List[int] = []
+        self._rules: List[BadgeRule] = []
+
+    def add(self, rule: BadgeRule) -> None:
+        position = bisect_right(self._thresholds, rule.threshold)
+        self._thresholds.insert(position, rule.threshold)
+        self._rules.insert(position, rule)
+
+    def crossed(self, before: int, after: int) -> List[BadgeRule]:
+        """Rules with ``before < threshold <= after``."""
+        if after <= before:
+            return []
+        return self._rules[bisect_right(self._thresholds, before) : bisect_right(self._thresholds, after)]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+class RuleEngine:
+    """Registered badge rules, indexed by kind and threshold."""
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, BadgeRule] = {}
+        self._level = _ThresholdIndex()
+        self._xp = _ThresholdIndex()
+        self._rewards: Dict[Tuple[int, Optional[str]], _ThresholdIndex] = {}
+
+    def add(self, rule: BadgeRule) -> None:
+        if rule.kind not in RULE_KINDS:
+            raise ValueError(f"Unknown rule kind: {rule.kind}")
+        if rule.key in self._keys:
+            raise ValueError(f"Duplicate rule key: {rule.key}")
+        if rule.kind == "reward_count":
+            if rule.reward_id is None:
+                raise ValueError(f"Rule {rule.key} counts grants but names no reward")
+            if rule.period not in RULE_PERIODS:
+                raise ValueError(f"Unknown rule period: {rule.period}")
+            self._rewards.setdefault((rule.reward_id, rule.period), _ThresholdIndex()).add(rule)
+        else:
+            (self._level if rule.kind == "level" else self._xp).add(rule)
+        self._keys[rule.key] = rule
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def rules(self) -> List[BadgeRule]:
+        return list(self._keys.values())
+
+    def crossed_progress(self, old_level: int, new_level: int, old_xp: int, new_xp: int) -> List[BadgeRule]:
+        """Level and XP rules a student passed by moving between the two states."""
+        return self._level.crossed(old_level, new_level) + self._xp.crossed(old_xp, new_xp)
+
+    def reward_periods(self, reward_id: Optional[int]) -> List[Optional[str]]:
+        """Periods for which grants of ``reward_id`` have to be counted."""
+        if reward_id is None:
+            return []
+        return [period for rewarded, period in self._rewards if rewarded == reward_id]
+
+    def crossed_count(self, reward_id: int, period: Optional[str], before: int, after: int) -> List[BadgeRule]:
+        index = self._rewards.get((reward_id, period))
+        return index.crossed(before, after) if index is not None else []
+
+
+def default_rules(rewards: Sequence[Reward], icons: Mapping[str, str]) -> List[BadgeRule]:
+    """The classroom's standard milestones; ``icons`` maps ``star``/``rocket``/``heart`` to SVG."""
+    rules = [
+        BadgeRule("level-5", "level", 5, "Level 5", "Hat Level 5 erreicht.", icons["star"]),
+        BadgeRule("level-10", "level", 10, "Level 10", "Hat Level 10 erreicht.", icons["star"]),
+        BadgeRule("xp-500", "xp", 500, "500 XP", "Hat insgesamt 500 XP gesammelt.", icons["rocket"]),
+        BadgeRule("xp-1000", "xp", 1000, "1000 XP", "Hat insgesamt 1000 XP gesammelt.", icons["rocket"]),
+    ]
+    by_label = {reward.label: reward for reward in rewards}
+    teamgeist = by_label.get("Teamgeist")
+    if teamgeist is not None:
+        rules.append(
+            BadgeRule(
+                "teamgeist-3-week",
+                "reward_count",
+                3,
+                "Teamplayer:in der Woche",
+                "Dreimal Teamgeist in einer Woche.",
+                icons["heart"],
+                reward_id=teamgeist.reward_id,
+                period="week",
+            )
+        )
+    return rules
+
+
+def group_by_rule(awards: Iterable[Tuple[BadgeRule, int]]) -> Dict[str, Tuple[BadgeRule, List[int]]]:
+    """Collect ``(rule, student_id)`` pairs into one student list per rule key."""
+    grouped: Dict[str, Tuple[BadgeRule, List[int]]] = {}
+    for rule, student_id in awards:
+        grouped.setdefault(rule.key, (rule, []))[1].append(student_id)
+    return grouped
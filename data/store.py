@@ -1,206 +1,1084 @@
 """SQLite-backed data store for the ClassQuest desktop UI."""
 from __future__ import annotations
 
+import json
+import re
 import sqlite3
-from contextlib import closing
-from datetime import datetime
+import threading
+from concurrent.futures import Future
+from contextlib import closing, contextmanager
+from datetime import date, datetime
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
-from .models import Badge, Reward, Student
+from .analytics import RosterSnapshot
+from .assets import AssetCache, content_hash
+from .batching import BadgeOp, BatchOp, GrantOp, WriteBatcher
+from .cache import CacheStats, IdentityMap
+from .events import BadgeAwarded, BulkGrant, ChangeBus, ChangeEvent, RewardAdded, StudentAdded, StudentUpdated
+from .instrumentation import TimedConnection
+from .leveling import LevelCurve
+from .migrations import migrate
+from .models import (
+    Badge,
+    ClassProgress,
+    LazyBadgeList,
+    LeaderboardEntry,
+    Reward,
+    Student,
+    StudentSummary,
+    XpEvent,
+    XpPeriodTotal,
+)
+from .pool import ReaderPool
+from .rules import BadgeRule, RuleEngine, award_key, group_by_rule, period_start
+from .svg_ingest import ingest_svg
+from .timestamps import from_epoch_day, from_epoch_micros, to_epoch_day, to_epoch_micros
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+XP_PERIODS = ("day", "week")
+ROSTER_SNAPSHOT_COLUMNS = "student_id, xp, level, badge_count, class_name"
+SEARCH_WORD = re.compile(r"\w+")
 
 
 class DataStore:
-    """High-level storage facade around a SQLite database."""
+    """High-level storage facade around a SQLite database.
+
+    The database is opened in WAL mode. Writes go through a single writer
+    connection guarded by a lock, while reads are served from a small pool of
+    read-only connections. All public methods may be called from any thread. Hydrated students and badges
+    are kept in identity maps, so repeated lookups return the same objects and
+    every mutation updates them in place. After each commit a typed event
+    naming the affected IDs is published on :attr:`events`.
+    """
 
-    def __init__(self, db_path: str | Path = "classquest.db") -> None:
+    def __init__(
+        self,
+        db_path: str | Path = "classquest.db",
+        *,
+        synchronous: str = "NORMAL",
+        cache_size_kib: int = 8192,
+        mmap_size: int = 64 * 1024 * 1024,
+        reader_pool_size: int = 2,
+        busy_timeout: float = 5.0,
+        student_cache_size: int = 256,
+        badge_cache_size: int = 4096,
+        batch_window: float = 0.05,
+        batch_max_ops: int = 32,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown synchronous mode: {synchronous}")
         self.db_path = Path(db_path)
-        self._connection = sqlite3.connect(self.db_path)
+        self._cache_size_kib = cache_size_kib
+        self._mmap_size = mmap_size
+        self._busy_timeout = busy_timeout
+        self._assets = AssetCache()
+        self._students: IdentityMap[int, Student] = IdentityMap(student_cache_size)
+        self._badges: IdentityMap[int, Badge] = IdentityMap(badge_cache_size)
+        self.events = ChangeBus()
+        self.rules = RuleEngine()
+        self._write_lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            self.db_path, timeout=busy_timeout, check_same_thread=False, factory=TimedConnection
+        )
         self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._apply_cache_pragmas(self._connection)
         self._ensure_schema()
+        self.level_curve = self._load_level_curve()
+        self._has_search_index = self._table_exists("roster_search")
+        self._readers: Optional[ReaderPool] = None
+        if str(db_path) not in (":memory:", "") and reader_pool_size > 0:
+            self._readers = ReaderPool(self._open_reader, reader_pool_size)
+        self.batcher = WriteBatcher(self, batch_window, batch_max_ops)
+
+    def _apply_cache_pragmas(self, connection: sqlite3.Connection) -> None:
+        connection.execute(f"PRAGMA cache_size={-int(self._cache_size_kib)}")
+        connection.execute(f"PRAGMA mmap_size={int(self._mmap_size)}")
+
+    def _open_reader(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            timeout=self._busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA query_only=ON")
+        self._apply_cache_pragmas(connection)
+        return connection
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Yield a connection for read-only queries.
+
+        In-memory databases cannot be shared, so they read through the writer.
+        """
+        if self._readers is None:
+            with self._write_lock:
+                yield self._connection
+            return
+        with self._readers.connection() as connection:
+            yield connection
 
     def _ensure_schema(self) -> None:
-        with closing(self._connection.cursor()) as cur:
-            cur.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS students (
-                    student_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    display_name TEXT NOT NULL,
-                    avatar_svg TEXT NOT NULL,
-                    xp INTEGER NOT NULL DEFAULT 0,
-                    level INTEGER NOT NULL DEFAULT 1
-                );
-
-                CREATE TABLE IF NOT EXISTS badges (
-                    badge_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    svg_icon TEXT NOT NULL,
-                    awarded_at TEXT NOT NULL,
-                    FOREIGN KEY(student_id) REFERENCES students(student_id)
-                );
-
-                CREATE TABLE IF NOT EXISTS rewards (
-                    reward_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    label TEXT NOT NULL,
-                    xp_amount INTEGER NOT NULL,
-                    color_role TEXT NOT NULL,
-                    description TEXT
-                );
-                """
-            )
-            self._connection.commit()
+        migrate(self._connection)
+
+    def _table_exists(self, name: str) -> bool:
+        row = self._connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return row.fetchone() is not None
+
+    def _load_level_curve(self) -> LevelCurve:
+        rows = self._connection.execute("SELECT min_xp FROM level_curve ORDER BY level").fetchall()
+        return LevelCurve([row["min_xp"] for row in rows])
+
+    # ------------------------------------------------------------------
+    # Asset helpers
+    # ------------------------------------------------------------------
+    def _store_asset(self, cur: sqlite3.Cursor, svg: str) -> tuple[str, str]:
+        """Ingest and persist ``svg`` once; return its hash and the interned string.
+
+        A document already in ``assets`` is reused as stored, without being
+        ingested again. This keeps legacy assets that the SVG migration could
+        not ingest usable, e.g. when a student with such an avatar is updated.
+        Raises :class:`~data.svg_ingest.SvgRejected` if a new document fails
+        validation.
+        """
+        stored_hash = content_hash(svg)
+        if self._assets.get(stored_hash) is not None or cur.execute(
+            "SELECT 1 FROM assets WHERE asset_hash = ?", (stored_hash,)
+        ).fetchone():
+            return stored_hash, self._assets.put(stored_hash, svg)
+        asset = ingest_svg(svg)
+        asset_hash = content_hash(asset.svg)
+        cur.execute(
+            "INSERT OR IGNORE INTO assets(asset_hash, svg, byte_size, render_cost) VALUES (?, ?, ?, ?)",
+            (asset_hash, asset.svg, asset.byte_size, asset.render_cost),
+        )
+        return asset_hash, self._assets.put(asset_hash, asset.svg)
+
+    def _resolve_assets(self, conn: sqlite3.Connection, hashes: Iterable[str]) -> dict[str, str]:
+        resolved: dict[str, str] = {}
+        missing: List[str] = []
+        for asset_hash in set(hashes):
+            svg = self._assets.get(asset_hash)
+            if svg is None:
+                missing.append(asset_hash)
+            else:
+                resolved[asset_hash] = svg
+        if missing:
+            with closing(conn.cursor()) as cur:
+                cur.execute(
+                    "SELECT asset_hash, svg FROM assets WHERE asset_hash IN (SELECT value FROM json_each(?))",
+                    (json.dumps(missing),),
+                )
+                for row in cur.fetchall():
+                    resolved[row["asset_hash"]] = self._assets.put(row["asset_hash"], row["svg"])
+        return resolved
 
     # ------------------------------------------------------------------
     # Student helpers
     # ------------------------------------------------------------------
-    def add_student(self, display_name: str, avatar_svg: str) -> Student:
-        with closing(self._connection.cursor()) as cur:
+    def add_student(self, display_name: str, avatar_svg: str, class_name: Optional[str] = None) -> Student:
+        with self._write_lock, closing(self._connection.cursor()) as cur:
+            avatar_hash, avatar_svg = self._store_asset(cur, avatar_svg)
             cur.execute(
-                "INSERT INTO students(display_name, avatar_svg, xp, level) VALUES (?, ?, 0, 1)",
-                (display_name, avatar_svg),
+                "INSERT INTO students(display_name, avatar_hash, xp, level, class_name) VALUES (?, ?, 0, 1, ?)",
+                (display_name, avatar_hash, class_name),
             )
             student_id = cur.lastrowid
             self._connection.commit()
-        return Student(student_id=student_id, display_name=display_name, avatar_svg=avatar_svg)
+        student = Student(
+            student_id=student_id, display_name=display_name, avatar_svg=avatar_svg, class_name=class_name
+        )
+        self._students.put(student_id, student)
+        self.events.publish(StudentAdded((student_id,)))
+        return student
 
     def update_student(self, student: Student) -> None:
-        with closing(self._connection.cursor()) as cur:
+        """Persist ``student``; an XP difference is booked as an adjustment event.
+
+        The level is derived from the XP via :attr:`level_curve`, not taken
+        from ``student.level``.
+        """
+        with self._write_lock, closing(self._connection.cursor()) as cur:
+            student.level = self.level_curve.level_for(student.xp)
+            avatar_hash, student.avatar_svg = self._store_asset(cur, student.avatar_svg)
             cur.execute(
-                "UPDATE students SET display_name=?, avatar_svg=?, xp=?, level=? WHERE student_id=?",
-                (student.display_name, student.avatar_svg, student.xp, student.level, student.student_id),
+                """
+                INSERT INTO xp_events(student_id, reward_id, amount, created_at)
+                SELECT student_id, NULL, :xp - xp, :now FROM students
+                WHERE student_id = :student_id AND xp != :xp
+                """,
+                {"xp": student.xp, "now": to_epoch_micros(datetime.utcnow()), "student_id": student.student_id},
+            )
+            cur.execute(
+                """
+                UPDATE students SET display_name=?, avatar_hash=?, xp=?, level=?, class_name=?
+                WHERE student_id=?
+                """,
+                (
+                    student.display_name,
+                    avatar_hash,
+                    student.xp,
+                    student.level,
+                    student.class_name,
+                    student.student_id,
+                ),
             )
             self._connection.commit()
+            cached = self._students.peek(student.student_id)
+            if cached is not None and cached is not student:
+                # The cached instance keeps its badges; ``student`` may be a fresh object without them.
+                cached.display_name, cached.avatar_svg = student.display_name, student.avatar_svg
+                cached.xp, cached.level, cached.class_name = student.xp, student.level, student.class_name
+        self.events.publish(StudentUpdated((student.student_id,)))
 
-    def grant_xp(self, student_id: int, amount: int) -> Student:
-        student = self.get_student(student_id)
-        if student is None:
-            raise ValueError(f"Student {student_id} does not exist")
-        student.add_xp(amount)
-        self.update_student(student)
+    def grant_xp(self, student_id: int, amount: int, reward_id: Optional[int] = None) -> Student:
+        (student,) = self.bulk_grant_xp([student_id], amount, reward_id)
         return student
 
-    def bulk_grant_xp(self, student_ids: Iterable[int], amount: int) -> List[Student]:
-        updated_students: List[Student] = []
-        for student_id in student_ids:
-            updated_students.append(self.grant_xp(student_id, amount))
-        return updated_students
+    def bulk_grant_xp(
+        self, student_ids: Iterable[int], amount: int, reward_id: Optional[int] = None
+    ) -> List[Student]:
+        """Grant ``amount`` XP to all given students in a single transaction.
+
+        XP and level are computed in one ``UPDATE`` for the whole set, and one
+        ledger event per student is appended in the same transaction, as are
+        badges for any :attr:`rules` the grant makes a student meet. The grant
+        is all-or-nothing: if any ID is unknown, nothing is written and a
+        ``ValueError`` is raised. Duplicate IDs are granted once. The returned
+        students are in input order; cached students are updated in place and
+        the others load their badges lazily.
+        """
+        ids = self._grant_ids(student_ids, amount)
+        if not ids:
+            return []
+        with self._write_lock:
+            with self._connection, closing(self._connection.cursor()) as cur:
+                rows, awards = self._grant_in_transaction(cur, ids, amount, reward_id)
+            students = self._students_after_grant(ids, rows, {student_id for student_id, _ in awards})
+            self._remember_awards(awards)
+        self.events.publish(BulkGrant(tuple(ids), amount, reward_id))
+        self._publish_awards(awards)
+        return students
+
+    @staticmethod
+    def _grant_ids(student_ids: Iterable[int], amount: int) -> List[int]:
+        if amount < 0:
+            raise ValueError("XP amount must be non-negative")
+        return list(dict.fromkeys(int(student_id) for student_id in student_ids))
+
+    def _grant_in_transaction(
+        self, cur: sqlite3.Cursor, ids: List[int], amount: int, reward_id: Optional[int]
+    ) -> Tuple[dict[int, sqlite3.Row], List[Tuple[int, Badge]]]:
+        """Apply one grant inside the caller's transaction.
+
+        Returns the updated rows by ID and the ``(student_id, badge)`` pairs
+        awarded by rules.
+        """
+        now = datetime.utcnow()
+        cur.execute(
+            """
+            UPDATE students
+            SET xp = xp + :amount,
+                level = (SELECT level FROM level_curve WHERE min_xp <= xp + :amount ORDER BY min_xp DESC LIMIT 1)
+            WHERE student_id IN (SELECT value FROM json_each(:ids))
+            RETURNING student_id, display_name, avatar_hash, xp, level, badge_count, class_name,
+                      xp - :amount AS old_xp
+            """,
+            {"amount": amount, "ids": json.dumps(ids)},
+        )
+        rows = {row["student_id"]: row for row in cur.fetchall()}
+        missing = [student_id for student_id in ids if student_id not in rows]
+        if missing:
+            raise ValueError(f"Students {missing} do not exist")
+        cur.execute(
+            """
+            INSERT INTO xp_events(student_id, reward_id, amount, created_at)
+            SELECT value, :reward_id, :amount, :now FROM json_each(:ids)
+            """,
+            {
+                "reward_id": reward_id,
+                "amount": amount,
+                "now": to_epoch_micros(now),
+                "ids": json.dumps(ids),
+            },
+        )
+        awards = self._evaluate_rules(cur, ids, rows, reward_id, now) if self.rules else []
+        return rows, awards
+
+    def _students_after_grant(
+        self, ids: List[int], rows: dict[int, sqlite3.Row], awarded: Set[int] = frozenset()
+    ) -> List[Student]:
+        """Students after a grant; ``awarded`` are the IDs that rules gave a badge.
+
+        The rows were returned before the rule badges were inserted, so their
+        badge count is too low for ``awarded`` students. Those that are not
+        cached load their badges lazily rather than starting with an empty list.
+        """
+        ordered = [rows[student_id] for student_id in ids]
+        students = self._hydrate_students(self._connection, ordered, lazy_badges=True)
+        for student, row in zip(students, ordered):
+            student.xp = row["xp"]
+            student.level = row["level"]
+            uncached = self._students.peek(student.student_id) is None
+            if student.student_id in awarded and not row["badge_count"] and uncached:
+                student.badges = LazyBadgeList(loader=partial(self.get_badges_for_student, student.student_id))
+        return students
 
     def get_student(self, student_id: int) -> Optional[Student]:
-        with closing(self._connection.cursor()) as cur:
+        """Return the student with badges loaded, so callers never hit the database later.
+
+        A student read from a reader snapshot is only cached if no write
+        changed its row in the meantime; see :meth:`_cache_read_student`.
+        """
+        student = self._students.get(student_id)
+        if student is not None:
+            if not getattr(student.badges, "loaded", True):
+                len(student.badges)  # Load lazy badges here, on the calling (worker) thread.
+            return student
+        with self._reading() as conn, closing(conn.cursor()) as cur:
             cur.execute("SELECT * FROM students WHERE student_id=?", (student_id,))
             row = cur.fetchone()
-        if row is None:
-            return None
-        student = Student(
-            student_id=row["student_id"],
-            display_name=row["display_name"],
-            avatar_svg=row["avatar_svg"],
-            xp=row["xp"],
-            level=row["level"],
-        )
-        student.badges.extend(self.get_badges_for_student(student.student_id))
+            if row is None:
+                return None
+            avatars = self._resolve_assets(conn, [row["avatar_hash"]])
+            student = self._student_from_row(row, avatars)
+            student.badges.extend(self._query_badges_for_student(conn, student_id))
+        return self._cache_read_student(student, row)
+
+    def _cache_read_student(self, student: Student, row: sqlite3.Row) -> Student:
+        """Cache ``student`` unless a write committed since ``row`` was read.
+
+        Writers update cached students in place, but a student that was not
+        cached yet when a write committed would otherwise be cached with the
+        values of the older snapshot. Re-reading the row under the write lock
+        detects this: XP, level, name and badge count all live in the row.
+        An outdated student is returned uncached.
+        """
+        with self._write_lock:
+            cached = self._students.peek(student.student_id)
+            if cached is not None:
+                return cached
+            current = self._connection.execute(
+                "SELECT * FROM students WHERE student_id=?", (student.student_id,)
+            ).fetchone()
+            if current is not None and tuple(current) == tuple(row):
+                return self._students.put(student.student_id, student)
+        # Outdated already; the change event of that write makes callers ask again.
         return student
 
     def list_students(self) -> List[Student]:
-        with closing(self._connection.cursor()) as cur:
+        """Return all students; their badges are loaded on first access."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
             cur.execute("SELECT * FROM students ORDER BY display_name COLLATE NOCASE")
+            return self._hydrate_students(conn, cur.fetchall(), lazy_badges=True)
+
+    def has_students(self) -> bool:
+        with self._reading() as conn:
+            return conn.execute("SELECT EXISTS(SELECT 1 FROM students)").fetchone()[0] == 1
+
+    def list_roster(self, student_ids: Optional[Iterable[int]] = None) -> List[StudentSummary]:
+        """Return lightweight roster rows sorted by name, without SVG or badge data.
+
+        With ``student_ids`` only those rows are returned, e.g. to refresh the
+        students named by a change event.
+        """
+        sql = "SELECT student_id, display_name, xp, level, badge_count, class_name FROM students"
+        params: List[Any] = []
+        if student_ids is not None:
+            sql += " WHERE student_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(student_id) for student_id in student_ids]))
+        sql += " ORDER BY display_name COLLATE NOCASE"
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            cur.execute(sql, params)
             rows = cur.fetchall()
-        students = [
-            Student(
+        return [
+            StudentSummary(
                 student_id=row["student_id"],
                 display_name=row["display_name"],
-                avatar_svg=row["avatar_svg"],
                 xp=row["xp"],
                 level=row["level"],
+                badge_count=row["badge_count"],
+                class_name=row["class_name"],
             )
             for row in rows
         ]
-        badges_by_student = self._load_badges_grouped()
-        for student in students:
-            student.badges.extend(badges_by_student.get(student.student_id, []))
+
+    def roster_snapshot(self) -> RosterSnapshot:
+        """Return the numeric roster columns as a :class:`RosterSnapshot` for analytics."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            cur.execute(f"SELECT {ROSTER_SNAPSHOT_COLUMNS} FROM students ORDER BY student_id")
+            return RosterSnapshot(cur.fetchall())
+
+    def refresh_roster_snapshot(self, snapshot: RosterSnapshot, student_ids: Iterable[int]) -> RosterSnapshot:
+        """Re-read only ``student_ids`` (e.g. from a change event) and patch them into ``snapshot``."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            cur.execute(
+                f"""
+                SELECT {ROSTER_SNAPSHOT_COLUMNS} FROM students
+                WHERE student_id IN (SELECT value FROM json_each(?)) ORDER BY student_id
+                """,
+                (json.dumps([int(student_id) for student_id in student_ids]),),
+            )
+            snapshot.patch(cur.fetchall())
+        return snapshot
+
+    def _hydrate_students(
+        self, conn: sqlite3.Connection, rows: List[sqlite3.Row], lazy_badges: bool = False
+    ) -> List[Student]:
+        """Build students from rows, reusing objects already in the identity map."""
+        avatars = self._resolve_assets(conn, (row["avatar_hash"] for row in rows))
+        students: List[Student] = []
+        for row in rows:
+            student = self._students.peek(row["student_id"])
+            if student is None:
+                student = self._student_from_row(row, avatars)
+                if lazy_badges and row["badge_count"]:
+                    student.badges = LazyBadgeList(loader=partial(self.get_badges_for_student, student.student_id))
+            students.append(student)
         return students
 
+    @staticmethod
+    def _student_from_row(row: sqlite3.Row, avatars: dict[str, str]) -> Student:
+        return Student(
+            student_id=row["student_id"],
+            display_name=row["display_name"],
+            avatar_svg=avatars[row["avatar_hash"]],
+            xp=row["xp"],
+            level=row["level"],
+            class_name=row["class_name"],
+        )
+
     # ------------------------------------------------------------------
-    # Badge helpers
+    # Search
     # ------------------------------------------------------------------
-    def award_badge(self, student_id: int, name: str, description: str, svg_icon: str) -> Badge:
-        awarded_at = datetime.utcnow().isoformat()
-        with closing(self._connection.cursor()) as cur:
-            cur.execute(
+    def search_students(self, text: str) -> List[int]:
+        """Return the IDs of students whose name or badges match every word of ``text``.
+
+        Words match as prefixes and ignore case and diacritics ("zoe mu"
+        finds "Zoë Müller"). Answered from the ``roster_search`` FTS5 index;
+        without FTS5 a slower ``LIKE`` scan is used. Text without any word
+        matches nothing.
+        """
+        words = SEARCH_WORD.findall(text)
+        if not words:
+            return []
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            if self._has_search_index:
+                query = " ".join(f'"{word}"*' for word in words)
+                cur.execute("SELECT rowid FROM roster_search WHERE roster_search MATCH ? ORDER BY rowid", (query,))
+            else:
+                condition = """
+                    (display_name LIKE ? ESCAPE '!' OR EXISTS (
+                        SELECT 1 FROM badges b WHERE b.student_id = students.student_id
+                        AND (b.name LIKE ? ESCAPE '!' OR b.description LIKE ? ESCAPE '!')))
                 """
-                INSERT INTO badges(student_id, name, description, svg_icon, awarded_at)
-                VALUES (?, ?, ?, ?, ?)
+                # Words are runs of word characters, so "_" is the only wildcard they can contain.
+                patterns = [f"%{word.replace('_', '!_')}%" for word in words]
+                cur.execute(
+                    f"SELECT student_id FROM students WHERE {' AND '.join([condition] * len(words))} "
+                    "ORDER BY student_id",
+                    [pattern for pattern in patterns for _ in range(3)],
+                )
+            return [row[0] for row in cur.fetchall()]
+
+    # ------------------------------------------------------------------
+    # Level curve
+    # ------------------------------------------------------------------
+    def set_level_curve(self, curve: LevelCurve) -> List[int]:
+        """Make ``curve`` the active level curve and recompute every level.
+
+        The thresholds replace the ``level_curve`` table and all levels are
+        recomputed in one ``UPDATE`` that looks each student's XP up in it.
+        Level rules newly met are awarded in the same transaction. Returns
+        the IDs of students whose level changed.
+        """
+        with self._write_lock:
+            with self._connection, closing(self._connection.cursor()) as cur:
+                cur.execute("DELETE FROM level_curve")
+                cur.executemany(
+                    "INSERT INTO level_curve(level, min_xp) VALUES (?, ?)", enumerate(curve.thresholds, start=1)
+                )
+                cur.execute(
+                    """
+                    UPDATE students
+                    SET level = (SELECT level FROM level_curve WHERE min_xp <= xp ORDER BY min_xp DESC LIMIT 1)
+                    WHERE level != (SELECT level FROM level_curve WHERE min_xp <= xp ORDER BY min_xp DESC LIMIT 1)
+                    RETURNING student_id, level
+                    """
+                )
+                changed = {row["student_id"]: row["level"] for row in cur.fetchall()}
+                level_rules = [rule for rule in self.rules.rules() if rule.kind == "level"]
+                awards = self._backfill_rules(cur, level_rules, datetime.utcnow()) if changed else []
+            self.level_curve = curve
+            for student_id, level in changed.items():
+                student = self._students.peek(student_id)
+                if student is not None:
+                    student.level = level
+            self._remember_awards(awards)
+        if changed:
+            self.events.publish(StudentUpdated(tuple(changed)))
+        self._publish_awards(awards)
+        return list(changed)
+
+    # ------------------------------------------------------------------
+    # Leaderboard
+    # ------------------------------------------------------------------
+    # Ordering is (xp DESC, student_id), matching idx_students_xp and
+    # idx_students_class_xp, so every query below is an index range scan.
+    # Ranks are competition ranks: 1 + the number of students with more XP.
+
+    @staticmethod
+    def _class_scope(class_name: Optional[str]) -> str:
+        return "class_name = :class_name AND" if class_name is not None else ""
+
+    def leaderboard(self, limit: int = 10, class_name: Optional[str] = None) -> List[LeaderboardEntry]:
+        """Return the top ``limit`` students by XP, optionally within one class."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            cur.execute(
+                f"""
+                SELECT RANK() OVER (ORDER BY xp DESC) AS rank, *
+                FROM (
+                    SELECT student_id, display_name, xp, level FROM students
+                    WHERE {self._class_scope(class_name)} 1
+                    ORDER BY xp DESC, student_id LIMIT :limit
+                )
+                ORDER BY xp DESC, student_id
                 """,
-                (student_id, name, description, svg_icon, awarded_at),
+                {"class_name": class_name, "limit": limit},
             )
-            badge_id = cur.lastrowid
-            self._connection.commit()
+            return [self._leaderboard_entry(row, row["rank"]) for row in cur.fetchall()]
+
+    def rank_of(self, student_id: int, class_name: Optional[str] = None) -> Optional[int]:
+        """Return the student's rank, or ``None`` if they are not in scope."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            row = self._scoped_student(cur, student_id, class_name)
+            if row is None:
+                return None
+            return self._count_ahead(cur, row["xp"], None, class_name) + 1
+
+    def leaderboard_around(
+        self, student_id: int, k: int = 2, class_name: Optional[str] = None
+    ) -> List[LeaderboardEntry]:
+        """Return the student together with up to ``k`` neighbours on each side."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            row = self._scoped_student(cur, student_id, class_name)
+            if row is None:
+                return []
+            scope = self._class_scope(class_name)
+            params = {"class_name": class_name, "xp": row["xp"], "student_id": student_id, "k": k}
+            cur.execute(
+                f"""
+                SELECT student_id, display_name, xp, level FROM students
+                WHERE {scope} xp >= :xp AND NOT (xp = :xp AND student_id >= :student_id)
+                ORDER BY xp ASC, student_id DESC LIMIT :k
+                """,
+                params,
+            )
+            above = cur.fetchall()[::-1]
+            cur.execute(
+                f"""
+                SELECT student_id, display_name, xp, level FROM students
+                WHERE {scope} xp <= :xp AND NOT (xp = :xp AND student_id <= :student_id)
+                ORDER BY xp DESC, student_id LIMIT :k
+                """,
+                params,
+            )
+            rows = above + [row] + cur.fetchall()
+            first = rows[0]
+            rank = self._count_ahead(cur, first["xp"], None, class_name) + 1
+            position = self._count_ahead(cur, first["xp"], first["student_id"], class_name) + 1
+        entries = [self._leaderboard_entry(first, rank)]
+        for offset, current in enumerate(rows[1:], start=1):
+            if current["xp"] != entries[-1].xp:
+                rank = position + offset
+            entries.append(self._leaderboard_entry(current, rank))
+        return entries
+
+    def _scoped_student(
+        self, cur: sqlite3.Cursor, student_id: int, class_name: Optional[str]
+    ) -> Optional[sqlite3.Row]:
+        cur.execute(
+            f"""
+            SELECT student_id, display_name, xp, level FROM students
+            WHERE {self._class_scope(class_name)} student_id = :student_id
+            """,
+            {"class_name": class_name, "student_id": student_id},
+        )
+        return cur.fetchone()
+
+    def _count_ahead(
+        self, cur: sqlite3.Cursor, xp: int, student_id: Optional[int], class_name: Optional[str]
+    ) -> int:
+        """Count students with more XP, or ordered before ``student_id`` if given."""
+        tie_break = "OR (xp = :xp AND student_id < :student_id)" if student_id is not None else ""
+        cur.execute(
+            f"""
+            SELECT COUNT(*) FROM students
+            WHERE {self._class_scope(class_name)} xp >= :xp AND (xp > :xp {tie_break})
+            """,
+            {"class_name": class_name, "xp": xp, "student_id": student_id},
+        )
+        return cur.fetchone()[0]
+
+    @staticmethod
+    def _leaderboard_entry(row: sqlite3.Row, rank: int) -> LeaderboardEntry:
+        return LeaderboardEntry(
+            rank=rank,
+            student_id=row["student_id"],
+            display_name=row["display_name"],
+            xp=row["xp"],
+            level=row["level"],
+        )
+
+    # ------------------------------------------------------------------
+    # Badge helpers
+    # ------------------------------------------------------------------
+    def award_badge(self, student_id: int, name: str, description: str, svg_icon: str) -> Badge:
+        with self._write_lock:
+            with self._connection, closing(self._connection.cursor()) as cur:
+                badge = self._insert_badge(cur, student_id, name, description, svg_icon)
+            self._remember_badge(student_id, badge)
+        self.events.publish(BadgeAwarded((badge.badge_id,), (student_id,)))
+        return badge
+
+    def _insert_badge(
+        self, cur: sqlite3.Cursor, student_id: int, name: str, description: str, svg_icon: str
+    ) -> Badge:
+        awarded_at = datetime.utcnow()
+        icon_hash, svg_icon = self._store_asset(cur, svg_icon)
+        cur.execute(
+            """
+            INSERT INTO badges(student_id, name, description, icon_hash, awarded_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (student_id, name, description, icon_hash, to_epoch_micros(awarded_at)),
+        )
         return Badge(
-            badge_id=badge_id,
+            badge_id=cur.lastrowid,
             name=name,
             description=description,
             svg_icon=svg_icon,
-            awarded_at=datetime.fromisoformat(awarded_at),
+            awarded_at=awarded_at,
         )
 
+    def _remember_badge(self, student_id: int, badge: Badge) -> None:
+        """Add a committed badge to the caches."""
+        self._badges.put(badge.badge_id, badge)
+        student = self._students.peek(student_id)
+        if student is not None and getattr(student.badges, "loaded", True):
+            student.badges.insert(0, badge)
+
     def get_badges_for_student(self, student_id: int) -> List[Badge]:
-        with closing(self._connection.cursor()) as cur:
+        with self._reading() as conn:
+            return self._query_badges_for_student(conn, student_id)
+
+    def _query_badges_for_student(self, conn: sqlite3.Connection, student_id: int) -> List[Badge]:
+        with closing(conn.cursor()) as cur:
             cur.execute(
-                "SELECT * FROM badges WHERE student_id=? ORDER BY datetime(awarded_at) DESC",
+                "SELECT * FROM badges WHERE student_id=? ORDER BY awarded_at DESC, badge_id DESC",
                 (student_id,),
             )
             rows = cur.fetchall()
+        return self._hydrate_badges(conn, rows)
+
+    def get_badges(self, badge_ids: Iterable[int]) -> List[Badge]:
+        """Return the given badges, newest first; cached badges skip the database."""
+        ids = list(dict.fromkeys(int(badge_id) for badge_id in badge_ids))
+        badges = [badge for badge in map(self._badges.get, ids) if badge is not None]
+        missing = [badge_id for badge_id in ids if self._badges.peek(badge_id) is None]
+        if missing:
+            with self._reading() as conn, closing(conn.cursor()) as cur:
+                cur.execute(
+                    "SELECT * FROM badges WHERE badge_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(missing),),
+                )
+                badges += self._hydrate_badges(conn, cur.fetchall())
+        badges.sort(key=lambda badge: (badge.awarded_at, badge.badge_id), reverse=True)
+        return badges
+
+    def list_badges(self, limit: Optional[int] = None, after: Optional[Badge] = None) -> List[Badge]:
+        """Return awarded badges, newest first, without loading students.
+
+        Pass the last badge of the previous page as ``after`` to continue
+        with the next ``limit`` badges (keyset paging on the awarded index).
+        """
+        sql = "SELECT * FROM badges"
+        params: List[Any] = []
+        if after is not None:
+            sql += " WHERE (awarded_at, badge_id) < (?, ?)"
+            params += [to_epoch_micros(after.awarded_at), after.badge_id]
+        sql += " ORDER BY awarded_at DESC, badge_id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            cur.execute(sql, params)
+            return self._hydrate_badges(conn, cur.fetchall())
+
+    def _hydrate_badges(self, conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> List[Badge]:
+        badges: List[Optional[Badge]] = [self._badges.get(row["badge_id"]) for row in rows]
+        icons = self._resolve_assets(
+            conn, (row["icon_hash"] for row, badge in zip(rows, badges) if badge is None)
+        )
+        for index, row in enumerate(rows):
+            if badges[index] is None:
+                badges[index] = self._badges.put(
+                    row["badge_id"],
+                    Badge(
+                        badge_id=row["badge_id"],
+                        name=row["name"],
+                        description=row["description"],
+                        svg_icon=icons[row["icon_hash"]],
+                        awarded_at=from_epoch_micros(row["awarded_at"]),
+                    ),
+                )
+        return badges  # type: ignore[return-value]
+
+    # ------------------------------------------------------------------
+    # Badge rules
+    # ------------------------------------------------------------------
+    def add_badge_rules(self, rules: Iterable[BadgeRule]) -> List[Badge]:
+        """Register ``rules`` and award them to every student who already qualifies.
+
+        From then on each grant evaluates them incrementally. Only rules this
+        database has not seen before are backfilled; ``badge_rules`` records
+        the others. Returns the badges awarded now.
+        """
+        rules = list(rules)
+        scratch = RuleEngine()
+        for rule in [*self.rules.rules(), *rules]:
+            scratch.add(rule)  # Validate the whole set before registering any of it.
+        with self._write_lock:
+            for rule in rules:
+                self.rules.add(rule)
+            now = datetime.utcnow()
+            with self._connection, closing(self._connection.cursor()) as cur:
+                cur.execute(
+                    "SELECT rule_key FROM badge_rules WHERE rule_key IN (SELECT value FROM json_each(?))",
+                    (json.dumps([rule.key for rule in rules]),),
+                )
+                known = {row["rule_key"] for row in cur.fetchall()}
+                new_rules = [rule for rule in rules if rule.key not in known]
+                awards = self._backfill_rules(cur, new_rules, now) if new_rules else []
+                cur.executemany(
+                    "INSERT INTO badge_rules(rule_key, backfilled_at) VALUES (?, ?)",
+                    [(rule.key, to_epoch_micros(now)) for rule in new_rules],
+                )
+            self._remember_awards(awards)
+        self._publish_awards(awards)
+        return [badge for _, badge in awards]
+
+    def _backfill_rules(
+        self, cur: sqlite3.Cursor, rules: Sequence[BadgeRule], now: datetime
+    ) -> List[Tuple[int, Badge]]:
+        """Award ``rules`` to every student meeting them now, one query per rule."""
+        crossed: List[Tuple[BadgeRule, int]] = []
+        for rule in rules:
+            if rule.kind == "reward_count":
+                cur.execute(
+                    """
+                    SELECT student_id FROM xp_events
+                    WHERE reward_id = ? AND created_at >= ?
+                    GROUP BY student_id HAVING COUNT(*) >= ?
+                    """,
+                    (rule.reward_id, period_start(rule.period, now), rule.threshold),
+                )
+            else:
+                cur.execute(f"SELECT student_id FROM students WHERE {rule.kind} >= ?", (rule.threshold,))
+            crossed += [(rule, row["student_id"]) for row in cur.fetchall()]
+        return self._award_rules(cur, crossed, now)
+
+    def _evaluate_rules(
+        self,
+        cur: sqlite3.Cursor,
+        ids: List[int],
+        rows: dict[int, sqlite3.Row],
+        reward_id: Optional[int],
+        now: datetime,
+    ) -> List[Tuple[int, Badge]]:
+        """Award the rules a grant made students meet; linear in ``len(ids)``."""
+        crossed: List[Tuple[BadgeRule, int]] = []
+        for student_id in ids:
+            row = rows[student_id]
+            old_level = self.level_curve.level_for(row["old_xp"])
+            for rule in self.rules.crossed_progress(old_level, row["level"], row["old_xp"], row["xp"]):
+                crossed.append((rule, student_id))
+        for period in self.rules.reward_periods(reward_id):
+            cur.execute(
+                """
+                SELECT student_id, COUNT(*) AS grants FROM xp_events
+                WHERE student_id IN (SELECT value FROM json_each(:ids))
+                  AND created_at >= :since AND reward_id = :reward_id
+                GROUP BY student_id
+                """,
+                {"ids": json.dumps(ids), "since": period_start(period, now), "reward_id": reward_id},
+            )
+            for row in cur.fetchall():
+                # This grant added exactly one event per student.
+                for rule in self.rules.crossed_count(reward_id, period, row["grants"] - 1, row["grants"]):
+                    crossed.append((rule, row["student_id"]))
+        return self._award_rules(cur, crossed, now) if crossed else []
+
+    def _award_rules(
+        self, cur: sqlite3.Cursor, crossed: List[Tuple[BadgeRule, int]], now: datetime
+    ) -> List[Tuple[int, Badge]]:
+        """Insert one badge per rule and student, skipping ones awarded before."""
+        awards: List[Tuple[int, Badge]] = []
+        for rule, student_ids in group_by_rule(crossed).values():
+            icon_hash, svg_icon = self._store_asset(cur, rule.svg_icon)
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO badges(student_id, name, description, icon_hash, awarded_at, rule_key)
+                SELECT value, :name, :description, :icon_hash, :awarded_at, :rule_key FROM json_each(:ids)
+                RETURNING badge_id, student_id
+                """,
+                {
+                    "name": rule.name,
+                    "description": rule.description,
+                    "icon_hash": icon_hash,
+                    "awarded_at": to_epoch_micros(now),
+                    "rule_key": award_key(rule, now),
+                    "ids": json.dumps(student_ids),
+                },
+            )
+            for row in cur.fetchall():
+                badge = Badge(
+                    badge_id=row["badge_id"],
+                    name=rule.name,
+                    description=rule.description,
+                    svg_icon=svg_icon,
+                    awarded_at=now,
+                )
+                awards.append((row["student_id"], badge))
+        return awards
+
+    def _remember_awards(self, awards: List[Tuple[int, Badge]]) -> None:
+        for student_id, badge in awards:
+            self._remember_badge(student_id, badge)
+
+    def _publish_awards(self, awards: List[Tuple[int, Badge]]) -> None:
+        if awards:
+            self.events.publish(
+                BadgeAwarded(
+                    tuple(badge.badge_id for _, badge in awards),
+                    tuple(dict.fromkeys(student_id for student_id, _ in awards)),
+                )
+            )
+
+    # ------------------------------------------------------------------
+    # Group commit
+    # ------------------------------------------------------------------
+    def queue_grant_xp(
+        self, student_ids: Iterable[int], amount: int, reward_id: Optional[int] = None
+    ) -> Future:
+        """Queue a ``bulk_grant_xp`` for the next group commit; returns a future."""
+        return self.batcher.submit(GrantOp(tuple(student_ids), amount, reward_id))
+
+    def queue_award_badge(self, student_id: int, name: str, description: str, svg_icon: str) -> Future:
+        """Queue an ``award_badge`` for the next group commit; returns a future."""
+        return self.batcher.submit(BadgeOp(student_id, name, description, svg_icon))
+
+    def flush(self) -> None:
+        """Commit all queued writes now."""
+        self.batcher.flush()
+
+    def apply_batch(self, operations: Sequence[BatchOp]) -> List[Any]:
+        """Apply ``operations`` in one transaction with a single commit.
+
+        Each operation runs inside its own savepoint, so a failing one is rolled
+        back without affecting the others. Returns, per operation, either what
+        the matching direct call would have returned or the raised exception.
+        """
+        outcomes: List[Any] = []
+        with self._write_lock:
+            with self._connection, closing(self._connection.cursor()) as cur:
+                cur.execute("BEGIN IMMEDIATE")
+                for op in operations:
+                    cur.execute("SAVEPOINT batch_op")
+                    try:
+                        if isinstance(op, GrantOp):
+                            ids = self._grant_ids(op.student_ids, op.amount)
+                            granted = self._grant_in_transaction(cur, ids, op.amount, op.reward_id) if ids else ({}, [])
+                            outcome: Any = (ids, *granted)
+                        else:
+                            outcome = self._insert_badge(cur, op.student_id, op.name, op.description, op.svg_icon)
+                    except Exception as error:  # noqa: BLE001 - reported per operation
+                        cur.execute("ROLLBACK TO batch_op")
+                        outcome = error
+                    cur.execute("RELEASE batch_op")
+                    outcomes.append(outcome)
+            results: List[Any] = []
+            events: List[ChangeEvent] = []
+            for op, outcome in zip(operations, outcomes):
+                if isinstance(outcome, BaseException):
+                    results.append(outcome)
+                elif isinstance(op, GrantOp):
+                    ids, rows, awards = outcome
+                    results.append(self._students_after_grant(ids, rows))
+                    self._remember_awards(awards)
+                    if ids:
+                        events.append(BulkGrant(tuple(ids), op.amount, op.reward_id))
+                    for student_id, badge in awards:
+                        events.append(BadgeAwarded((badge.badge_id,), (student_id,)))
+                else:
+                    self._remember_badge(op.student_id, outcome)
+                    results.append(outcome)
+                    events.append(BadgeAwarded((outcome.badge_id,), (op.student_id,)))
+        for event in events:
+            self.events.publish(event)
+        return results
+
+    # ------------------------------------------------------------------
+    # XP history
+    # ------------------------------------------------------------------
+    def list_xp_events(self, student_id: Optional[int] = None, limit: int = 50) -> List[XpEvent]:
+        """Return the most recent ledger entries, optionally for one student."""
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            if student_id is None:
+                cur.execute("SELECT * FROM xp_events ORDER BY event_id DESC LIMIT ?", (limit,))
+            else:
+                cur.execute(
+                    """
+                    SELECT * FROM xp_events WHERE student_id=?
+                    ORDER BY created_at DESC, event_id DESC LIMIT ?
+                    """,
+                    (student_id, limit),
+                )
+            rows = cur.fetchall()
         return [
-            Badge(
-                badge_id=row["badge_id"],
-                name=row["name"],
-                description=row["description"],
-                svg_icon=row["svg_icon"],
-                awarded_at=datetime.fromisoformat(row["awarded_at"]),
+            XpEvent(
+                event_id=row["event_id"],
+                student_id=row["student_id"],
+                reward_id=row["reward_id"],
+                amount=row["amount"],
+                created_at=from_epoch_micros(row["created_at"]),
             )
             for row in rows
         ]
 
-    def _load_badges_grouped(self) -> dict[int, List[Badge]]:
-        with closing(self._connection.cursor()) as cur:
-            cur.execute("SELECT * FROM badges ORDER BY student_id")
+    def xp_totals(
+        self,
+        period: str = "week",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        student_ids: Optional[Iterable[int]] = None,
+    ) -> List[XpPeriodTotal]:
+        """Return XP earned per ``period`` (``"day"`` or ``"week"``), oldest first.
+
+        Periods are UTC days and Monday-based weeks. ``start`` and ``end`` are
+        inclusive bounds on the period start. Totals are read from rollup tables,
+        so the cost grows with the number of periods and not with the ledger.
+        """
+        if period not in XP_PERIODS:
+            raise ValueError(f"Unknown XP period: {period}")
+        params = {
+            "period": period,
+            "start": to_epoch_day(start) if start is not None else None,
+            "end": to_epoch_day(end) if end is not None else None,
+        }
+        bounds = """
+            period = :period
+            AND (:start IS NULL OR period_start >= :start)
+            AND (:end IS NULL OR period_start <= :end)
+        """
+        with self._reading() as conn, closing(conn.cursor()) as cur:
+            if student_ids is None:
+                cur.execute(
+                    f"SELECT period_start, xp, grants FROM xp_period_totals WHERE {bounds} ORDER BY period_start",
+                    params,
+                )
+            else:
+                params["ids"] = json.dumps([int(student_id) for student_id in student_ids])
+                cur.execute(
+                    f"""
+                    SELECT period_start, SUM(xp) AS xp, SUM(grants) AS grants FROM xp_rollups
+                    WHERE {bounds} AND student_id IN (SELECT value FROM json_each(:ids))
+                    GROUP BY period_start ORDER BY period_start
+                    """,
+                    params,
+                )
             rows = cur.fetchall()
-        grouped: dict[int, List[Badge]] = {}
-        for row in rows:
-            badge = Badge(
-                badge_id=row["badge_id"],
-                name=row["name"],
-                description=row["description"],
-                svg_icon=row["svg_icon"],
-                awarded_at=datetime.fromisoformat(row["awarded_at"]),
-            )
-            grouped.setdefault(row["student_id"], []).append(badge)
-        return grouped
+        return [
+            XpPeriodTotal(period_start=from_epoch_day(row["period_start"]), xp=row["xp"], grants=row["grants"])
+            for row in rows
+        ]
+
+    # ------------------------------------------------------------------
+    # Class progress
+    # ------------------------------------------------------------------
+    # class_progress holds the XP total of all students; triggers on students
+    # apply each XP change as a delta, so reading it never sums the roster.
+    def class_progress(self) -> ClassProgress:
+        with self._reading() as conn:
+            row = conn.execute("SELECT total_xp, milestone_step FROM class_progress WHERE progress_id = 1").fetchone()
+        return ClassProgress.from_total(row["total_xp"], row["milestone_step"])
+
+    def set_class_milestone_step(self, step: int) -> ClassProgress:
+        """Award a class star every ``step`` XP instead of the default 1000."""
+        if step < 1:
+            raise ValueError("The milestone step must be positive")
+        with self._write_lock, self._connection:
+            row = self._connection.execute(
+                "UPDATE class_progress SET milestone_step = ? WHERE progress_id = 1 RETURNING total_xp", (step,)
+            ).fetchone()
+        return ClassProgress.from_total(row["total_xp"], step)
+
+    def check_class_progress(self) -> int:
+        """Compare the stored total with the students' XP and repair any drift.
+
+        Returns the difference that was corrected (stored minus actual), so
+        ``0`` means the aggregate was consistent. This scans the roster and is
+        meant to run occasionally, not on every refresh.
+        """
+        with self._write_lock, self._connection:
+            row = self._connection.execute(
+                """
+                SELECT total_xp, (SELECT COALESCE(SUM(xp), 0) FROM students) AS actual_xp
+                FROM class_progress WHERE progress_id = 1
+                """
+            ).fetchone()
+            drift = row["total_xp"] - row["actual_xp"]
+            if drift:
+                self._connection.execute(
+                    "UPDATE class_progress SET total_xp = ? WHERE progress_id = 1", (row["actual_xp"],)
+                )
+        return drift
 
     # ------------------------------------------------------------------
     # Reward helpers
     # ------------------------------------------------------------------
-    def ensure_default_rewards(self) -> None:
-        if self.list_rewards():
-            return
-        defaults = [
-            ("Mutiger Beitrag", 10, "primary", "Für eine mutige Wortmeldung"),
-            ("Teamgeist", 20, "success", "Hilft einem Teamkameraden"),
-            ("Goldstern", 50, "warning", "Außergewöhnliche Leistung"),
-        ]
-        for label, xp_amount, color_role, description in defaults:
-            self.add_reward(label, xp_amount, color_role, description)
+    def ensure_default_rewards(self) -> List[Reward]:
+        """Create the default rewards if none exist and return all rewards."""
+        with self._write_lock:
+            rewards = self.list_rewards()
+            if rewards:
+                return rewards
+            defaults = [
+                ("Mutiger Beitrag", 10, "primary", "Für eine mutige Wortmeldung"),
+                ("Teamgeist", 20, "success", "Hilft einem Teamkameraden"),
+                ("Goldstern", 50, "warning", "Außergewöhnliche Leistung"),
+            ]
+            return [
+                self.add_reward(label, xp_amount, color_role, description)
+                for label, xp_amount, color_role, description in defaults
+            ]
 
     def add_reward(self, label: str, xp_amount: int, color_role: str, description: str | None = None) -> Reward:
-        with closing(self._connection.cursor()) as cur:
+        with self._write_lock, closing(self._connection.cursor()) as cur:
             cur.execute(
                 "INSERT INTO rewards(label, xp_amount, color_role, description) VALUES (?, ?, ?, ?)",
                 (label, xp_amount, color_role, description),
             )
             reward_id = cur.lastrowid
             self._connection.commit()
+        self.events.publish(RewardAdded((reward_id,)))
         return Reward(
             reward_id=reward_id,
             label=label,
@@ -210,7 +1088,7 @@ class DataStore:
         )
 
     def list_rewards(self) -> List[Reward]:
-        with closing(self._connection.cursor()) as cur:
+        with self._reading() as conn, closing(conn.cursor()) as cur:
             cur.execute("SELECT * FROM rewards ORDER BY xp_amount")
             rows = cur.fetchall()
         return [
@@ -224,6 +1102,19 @@ class DataStore:
             for row in rows
         ]
 
+    # ------------------------------------------------------------------
+    def cache_stats(self) -> dict[str, CacheStats]:
+        return {"students": self._students.stats(), "badges": self._badges.stats()}
+
+    def clear_caches(self) -> None:
+        """Drop cached objects, e.g. after another process changed the database."""
+        self._students.clear()
+        self._badges.clear()
+
     # ------------------------------------------------------------------
     def close(self) -> None:
-        self._connection.close()
+        self.batcher.close()
+        if self._readers is not None:
+            self._readers.close()
+        with self._write_lock:
+            self._connection.close()
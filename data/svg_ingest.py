@@ -0,0 +1,253 @@
+"""Validate, minify and normalize SVG documents before they are stored.
+
+Every avatar and badge icon passes through :func:`ingest_svg` on its way into
+the ``assets`` table. The result is a compact document with an explicit
+``viewBox`` and matching unitless ``width``/``height``, stripped of comments,
+metadata, scripts and editor cruft, together with a render-cost estimate.
+Documents that are malformed, unsafe (DTDs, external references) or too
+expensive to draw are rejected with :class:`SvgRejected`.
+
+Ingesting is idempotent: ingesting an already ingested document returns it
+unchanged, so content hashes stay stable across re-saves.
+"""
+from __future__ import annotations
+
+import math
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+# Elements that never affect the rendered image, or that must not reach the renderer.
+DROPPED_ELEMENTS = frozenset({"metadata", "title", "desc", "script", "foreignObject"})
+TEXT_ELEMENTS = frozenset({"text", "tspan", "textPath"})
+GRADIENT_ELEMENTS = frozenset({"linearGradient", "radialGradient"})
+COMPOSITING_ELEMENTS = frozenset({"filter", "mask", "clipPath", "pattern"})
+WHITESPACE_ATTRIBUTES = frozenset({"d", "points", "transform", "viewBox", "style"})
+
+_PATH_COMMANDS = re.compile(r"[MmZzLlHhVvCcSsQqTtAa]")
+_SPACE_AROUND_COMMANDS = re.compile(r"\s*([MmZzLlHhVvCcSsQqTtAa])\s*")
+_LENGTH = re.compile(r"^\s*([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s*(px)?\s*$")
+_FORBIDDEN_MARKUP = re.compile(r"<!\s*(DOCTYPE|ENTITY)", re.IGNORECASE)
+_DECIMAL = re.compile(r"-?\d*\.\d+(?:[eE][-+]?\d+)?")
+
+
+class SvgRejected(ValueError):
+    """Raised when an SVG document is malformed, unsafe or too expensive to render."""
+
+
+@dataclass(frozen=True, slots=True)
+class SvgLimits:
+    max_bytes: int = 256 * 1024
+    max_elements: int = 4000
+    max_depth: int = 32
+    max_path_commands: int = 20000
+    max_gradients: int = 64
+    max_render_cost: int = 40000
+
+
+DEFAULT_LIMITS = SvgLimits()
+
+
+@dataclass(frozen=True, slots=True)
+class IngestedSvg:
+    svg: str
+    width: float
+    height: float
+    render_cost: int
+    source_bytes: int
+
+    @property
+    def byte_size(self) -> int:
+        return len(self.svg.encode("utf-8"))
+
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+def _local_name(tag: str) -> Tuple[Optional[str], str]:
+    if tag.startswith("{"):
+        namespace, _, name = tag[1:].partition("}")
+        return namespace, name
+    return None, tag
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else f"{value:g}"
+
+
+def _parse_length(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    match = _LENGTH.match(value)
+    return float(match.group(1)) if match else None
+
+
+def _walk(element: ET.Element, depth: int = 1) -> Iterator[Tuple[ET.Element, int]]:
+    yield element, depth
+    for child in element:
+        yield from _walk(child, depth + 1)
+
+
+def _clean(element: ET.Element, in_text: bool = False) -> None:
+    """Drop invisible or foreign nodes and insignificant whitespace, in place."""
+    _, name = _local_name(element.tag)
+    in_text = in_text or name in TEXT_ELEMENTS
+    for child in list(element):
+        if not isinstance(child.tag, str):
+            element.remove(child)
+            continue
+        namespace, child_name = _local_name(child.tag)
+        if namespace not in (None, SVG_NS) or child_name in DROPPED_ELEMENTS:
+            element.remove(child)
+            continue
+        if namespace is None:
+            child.tag = f"{{{SVG_NS}}}{child_name}"
+        _clean(child, in_text)
+    if not in_text:
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        for child in element:
+            if child.tail is not None and not child.tail.strip():
+                child.tail = None
+    for key in list(element.attrib):
+        namespace, attribute = _local_name(key)
+        if namespace not in (None, XLINK_NS) or attribute.lower().startswith("on"):
+            del element.attrib[key]
+            continue
+        value = element.attrib[key]
+        if attribute == "href" and not value.startswith(("#", "data:")):
+            raise SvgRejected("External references are not allowed")
+        if attribute in WHITESPACE_ATTRIBUTES:
+            value = " ".join(value.split())
+            if attribute == "d":
+                value = _SPACE_AROUND_COMMANDS.sub(r"\1", value)
+            element.attrib[key] = value
+
+
+def _normalize_size(root: ET.Element) -> Tuple[float, float]:
+    """Give ``root`` a viewBox and unitless width/height matching it."""
+    view_box = root.get("viewBox")
+    if view_box is not None:
+        try:
+            min_x, min_y, width, height = (float(part) for part in view_box.replace(",", " ").split())
+        except ValueError:
+            raise SvgRejected(f"Invalid viewBox: {view_box!r}") from None
+    else:
+        width, height = _parse_length(root.get("width")), _parse_length(root.get("height"))
+        if width is None or height is None:
+            raise SvgRejected("SVG has neither a viewBox nor absolute width and height")
+        min_x = min_y = 0.0
+    if width <= 0 or height <= 0:
+        raise SvgRejected("SVG has an empty viewBox")
+    root.set("viewBox", " ".join(_format_number(value) for value in (min_x, min_y, width, height)))
+    root.set("width", _format_number(width))
+    root.set("height", _format_number(height))
+    return width, height
+
+
+def _round_coordinates(root: ET.Element, width: float, height: float) -> None:
+    """Round fractional path and polygon coordinates to what the viewBox can show.
+
+    Three significant digits of the larger viewBox side survive, which is far
+    below a device pixel at the sizes the app renders. Paths with arcs are
+    left alone because their flags may be written without separators.
+    """
+    decimals = max(0, 3 - int(math.floor(math.log10(max(width, height)))))
+
+    def rounded(match: re.Match) -> str:
+        text = f"{float(match.group()):.{decimals}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+        return "0" if text == "-0" else text
+
+    for element, _ in _walk(root):
+        _, name = _local_name(element.tag)
+        attribute = "d" if name == "path" else "points" if name in ("polygon", "polyline") else None
+        value = element.get(attribute) if attribute else None
+        if value and not (attribute == "d" and re.search("[Aa]", value)):
+            element.set(attribute, _DECIMAL.sub(rounded, value))
+
+
+def _measure(root: ET.Element, limits: SvgLimits) -> int:
+    """Check ``root`` against ``limits`` and return its render-cost estimate.
+
+    The estimate is in relative units: one per element and path command, more
+    for gradients, and much more for compositing features (filters, masks,
+    clip paths, patterns) and embedded images, which need offscreen passes.
+    """
+    counts: Dict[str, int] = {"elements": 0, "commands": 0, "gradients": 0, "stops": 0, "compositing": 0, "images": 0}
+    for element, depth in _walk(root):
+        if depth > limits.max_depth:
+            raise SvgRejected(f"SVG is nested deeper than {limits.max_depth} levels")
+        _, name = _local_name(element.tag)
+        counts["elements"] += 1
+        if name == "path":
+            counts["commands"] += len(_PATH_COMMANDS.findall(element.get("d", "")))
+        elif name in ("polygon", "polyline"):
+            counts["commands"] += len(element.get("points", "").split()) // 2
+        elif name in GRADIENT_ELEMENTS:
+            counts["gradients"] += 1
+        elif name == "stop":
+            counts["stops"] += 1
+        elif name in COMPOSITING_ELEMENTS:
+            counts["compositing"] += 1
+        elif name == "image":
+            counts["images"] += 1
+    if counts["elements"] > limits.max_elements:
+        raise SvgRejected(f"SVG has {counts['elements']} elements (limit {limits.max_elements})")
+    if counts["commands"] > limits.max_path_commands:
+        raise SvgRejected(f"SVG has {counts['commands']} path commands (limit {limits.max_path_commands})")
+    if counts["gradients"] > limits.max_gradients:
+        raise SvgRejected(f"SVG has {counts['gradients']} gradients (limit {limits.max_gradients})")
+    cost = (
+        counts["elements"]
+        + counts["commands"]
+        + 8 * counts["gradients"]
+        + 2 * counts["stops"]
+        + 25 * counts["compositing"]
+        + 50 * counts["images"]
+    )
+    if cost > limits.max_render_cost:
+        raise SvgRejected(f"SVG render cost {cost} exceeds the limit of {limits.max_render_cost}")
+    return cost
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def ingest_svg(svg: str, limits: SvgLimits = DEFAULT_LIMITS) -> IngestedSvg:
+    """Validate and minify ``svg``; raises :class:`SvgRejected` if it is unusable."""
+    return _ingest(svg, limits)
+
+
+@lru_cache(maxsize=512)
+def _ingest(svg: str, limits: SvgLimits) -> IngestedSvg:
+    # The same handful of icons is awarded over and over, so results are memoized.
+    source_bytes = len(svg.encode("utf-8"))
+    if source_bytes > limits.max_bytes:
+        raise SvgRejected(f"SVG is {source_bytes} bytes (limit {limits.max_bytes})")
+    if _FORBIDDEN_MARKUP.search(svg):
+        raise SvgRejected("SVG documents must not declare a DOCTYPE or entities")
+    try:
+        root = ET.fromstring(svg)
+    except ET.ParseError as error:
+        raise SvgRejected(f"SVG is not well-formed XML: {error}") from None
+    namespace, name = _local_name(root.tag)
+    if name != "svg" or namespace not in (None, SVG_NS):
+        raise SvgRejected(f"Root element is <{name}>, not <svg>")
+    root.tag = f"{{{SVG_NS}}}svg"
+    _clean(root)
+    width, height = _normalize_size(root)
+    _round_coordinates(root, width, height)
+    render_cost = _measure(root, limits)
+    # Attribute values escape ">", so " />" can only be an empty-element close.
+    minified = ET.tostring(root, encoding="unicode").replace(" />", "/>")
+    return IngestedSvg(minified, width, height, render_cost, source_bytes)
@@ -0,0 +1,38 @@
+"""Conversion between datetimes and the integer timestamps stored in SQLite.
+
+Instants are stored as UTC microseconds since the epoch and calendar periods
+as UTC days since the epoch.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_DATE = _EPOCH.date()
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_micros(moment: datetime) -> int:
+    """Return microseconds since the Unix epoch; naive datetimes are taken as UTC."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_micros(value: int) -> datetime:
+    """Inverse of :func:`to_epoch_micros`, returning a naive UTC datetime."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def to_epoch_day(day: date) -> int:
+    """Return the number of days between the Unix epoch and ``day``."""
+    return (day - _EPOCH_DATE).days
+
+
+def from_epoch_day(value: int) -> date:
+    return _EPOCH_DATE + timedelta(days=value)
+
+
+def week_start(day: date) -> date:
+    """Return the Monday starting the ISO week that contains ``day``."""
+    return day - timedelta(days=day.weekday())
@@ -0,0 +1,70 @@
+"""Asynchronous facade that keeps SQLite work off the caller's thread."""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from .store import DataStore
+
+READ_METHODS = frozenset(
+    {
+        "get_student",
+        "list_students",
+        "has_students",
+        "list_roster",
+        "roster_snapshot",
+        "refresh_roster_snapshot",
+        "get_badges",
+        "get_badges_for_student",
+        "list_badges",
+        "list_rewards",
+        "list_xp_events",
+        "xp_totals",
+        "leaderboard",
+        "rank_of",
+        "leaderboard_around",
+        "class_progress",
+        "search_students",
+    }
+)
+
+
+class AsyncDataStore:
+    """Runs :class:`DataStore` methods in the background and returns futures.
+
+    Writes are serialized on one dedicated worker thread, the only thread that
+    uses the writer connection on behalf of the UI. Reads run on a small
+    separate pool backed by the store's read-only connections, so a long
+    listing never waits for a write and vice versa.
+
+    Any public store method is available under the same name, e.g.
+    ``worker.bulk_grant_xp(ids, 10)`` returns a ``Future[List[Student]]``.
+    """
+
+    def __init__(self, store: DataStore, read_workers: int = 2) -> None:
+        self.store = store
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="datastore-writer")
+        self._readers = ThreadPoolExecutor(max_workers=max(read_workers, 1), thread_name_prefix="datastore-reader")
+
+    def submit_write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self._writer.submit(fn, *args, **kwargs)
+
+    def submit_read(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self._readers.submit(fn, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Callable[..., Future]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self.store, name)
+        submit = self.submit_read if name in READ_METHODS else self.submit_write
+
+        def call(*args: Any, **kwargs: Any) -> Future:
+            return submit(method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work; with ``wait`` pending writes are completed first."""
+        self._readers.shutdown(wait=wait, cancel_futures=not wait)
+        self._writer.shutdown(wait=wait, cancel_futures=not wait)
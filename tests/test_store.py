@@ -0,0 +1,92 @@
+"""Regression tests for :class:`data.store.DataStore`."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import closing
+
+from data.migrations import BASE_SCHEMA
+from data.rules import BadgeRule
+from data.store import DataStore
+
+LEGACY_AVATAR = "<svg><circle r='3'/></svg>"
+
+
+def test_student_with_unparseable_legacy_avatar_can_be_updated(tmp_path):
+    path = tmp_path / "classquest.db"
+    with closing(sqlite3.connect(path)) as conn, conn:
+        for statement in BASE_SCHEMA:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT INTO students(display_name, avatar_svg, xp, level) VALUES (?, ?, ?, ?)",
+            ("Alex Abenteuer", LEGACY_AVATAR, 150, 2),
+        )
+    store = DataStore(path)
+    try:
+        student = store.get_student(1)
+        assert student.avatar_svg == LEGACY_AVATAR
+        student.display_name = "Alex Umbenannt"
+        student.xp = 260
+        store.update_student(student)
+        store.clear_caches()
+        reloaded = store.get_student(1)
+        assert (reloaded.display_name, reloaded.xp, reloaded.level) == ("Alex Umbenannt", 260, 3)
+        assert reloaded.avatar_svg == LEGACY_AVATAR
+    finally:
+        store.close()
+
+
+def test_cached_student_is_not_older_than_a_concurrent_grant(tmp_path, monkeypatch):
+    store = DataStore(tmp_path / "classquest.db", reader_pool_size=1)
+    try:
+        student_id = store.add_student("Mia Fuchs", "<svg width='4' height='4'/>").student_id
+        query_badges = store._query_badges_for_student
+
+        def query_then_grant(conn, queried_id):
+            # A grant on another thread commits after the reader's snapshot was taken.
+            badges = query_badges(conn, queried_id)
+            monkeypatch.undo()
+            writer = threading.Thread(target=store.bulk_grant_xp, args=([student_id], 10))
+            writer.start()
+            writer.join()
+            return badges
+
+        monkeypatch.setattr(store, "_query_badges_for_student", query_then_grant)
+        store.clear_caches()
+        assert store.get_student(student_id).xp == 0
+        assert store.get_student(student_id).xp == 10
+    finally:
+        store.close()
+
+
+def test_grant_returns_the_badge_a_rule_just_awarded(tmp_path):
+    store = DataStore(tmp_path / "classquest.db")
+    try:
+        store.add_badge_rules([BadgeRule("xp-50", "xp", 50, "50 XP", "Hat 50 XP gesammelt.", "<svg viewBox='0 0 4 4'/>")])
+        student_id = store.add_student("Mia Fuchs", "<svg width='4' height='4'/>").student_id
+        store.clear_caches()
+        student = store.grant_xp(student_id, 60)
+        assert [badge.name for badge in student.badges] == ["50 XP"]
+        assert [badge.name for badge in store.get_student(student_id).badges] == ["50 XP"]
+        assert store.list_roster([student_id])[0].badge_count == 1
+    finally:
+        store.close()
+
+
+def test_badge_rules_are_backfilled_only_when_first_registered(tmp_path):
+    path = tmp_path / "classquest.db"
+    rule = BadgeRule("xp-50", "xp", 50, "50 XP", "Hat 50 XP gesammelt.", "<svg viewBox='0 0 4 4'/>")
+    store = DataStore(path)
+    try:
+        store.grant_xp(store.add_student("Mia Fuchs", "<svg width='4' height='4'/>").student_id, 60)
+        assert [badge.name for badge in store.add_badge_rules([rule])] == ["50 XP"]
+    finally:
+        store.close()
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("DELETE FROM badges")
+    store = DataStore(path)
+    try:
+        later = BadgeRule("xp-60", "xp", 60, "60 XP", "Hat 60 XP gesammelt.", "<svg viewBox='0 0 4 4'/>")
+        assert [badge.name for badge in store.add_badge_rules([rule, later])] == ["60 XP"]
+    finally:
+        store.close()
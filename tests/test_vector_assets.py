@@ -0,0 +1,34 @@
+"""Tests for the shared SVG render cache in :mod:`ui.vector_assets`."""
+from __future__ import annotations
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from data.rules import default_rules  # noqa: E402
+from data.store import DataStore  # noqa: E402
+from ui.vector_assets import BADGE_ICON_SIZES, BADGE_SVGS, prewarm_badge_icons, render_cache  # noqa: E402
+
+
+def test_stored_rule_badge_hits_the_prewarmed_cache(tmp_path):
+    app = QApplication.instance() or QApplication([])
+    store = DataStore(tmp_path / "classquest.db")
+    try:
+        store.add_badge_rules(default_rules(store.ensure_default_rewards(), BADGE_SVGS))
+        student_id = store.add_student("Mia Fuchs", "<svg width='4' height='4'/>").student_id
+        store.grant_xp(student_id, 500)
+        badges = store.get_badges_for_student(student_id)
+        assert badges
+        render_cache.clear()
+        prewarm_badge_icons()
+        render_cache._pool.waitForDone()
+        for badge in badges:
+            for size in BADGE_ICON_SIZES.values():
+                assert render_cache.contains(render_cache.key(badge.svg_icon, size, 1.0))
+    finally:
+        store.close()
+        render_cache.stop_prewarm()
+        render_cache.clear()
+        del app
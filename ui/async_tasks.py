@@ -0,0 +1,101 @@
+"""Deliver background futures to the Qt event loop and show busy state."""
+from __future__ import annotations
+
+import sys
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QMessageBox, QProgressBar, QWidget
+
+
+class FutureWatcher(QObject):
+    """Calls ``on_result``/``on_error`` on the GUI thread once a future is done.
+
+    ``on_finished`` runs afterwards in every case, including cancellation.
+    """
+
+    _done = pyqtSignal()
+
+    def __init__(
+        self,
+        future: Future,
+        on_result: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        parent: Optional[QObject] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> None:
+        super().__init__(parent)
+        self._future = future
+        self._on_result = on_result
+        self._on_error = on_error
+        self._on_finished = on_finished
+        self._done.connect(self._deliver)
+        future.add_done_callback(self._notify)
+
+    def _notify(self, _future: Future) -> None:
+        # Runs on the worker thread; the queued signal hops to the GUI thread.
+        try:
+            self._done.emit()
+        except RuntimeError:
+            pass  # The owning widget was destroyed before the work finished.
+
+    @pyqtSlot()
+    def _deliver(self) -> None:
+        try:
+            result = self._future.result()
+        except CancelledError:
+            pass
+        except Exception as error:  # noqa: BLE001 - handed to the caller
+            if self._on_error is None:
+                sys.excepthook(type(error), error, error.__traceback__)
+            else:
+                self._on_error(error)
+        else:
+            self._on_result(result)
+        finally:
+            if self._on_finished is not None:
+                self._on_finished()
+            self.deleteLater()
+
+
+def run_async(
+    future: Future,
+    on_result: Callable[[Any], None],
+    on_error: Optional[Callable[[BaseException], None]] = None,
+    parent: Optional[QObject] = None,
+    busy: Optional[BusyIndicator] = None,
+) -> FutureWatcher:
+    """Watch ``future`` and keep ``busy`` visible until it has completed."""
+    if busy is None:
+        return FutureWatcher(future, on_result, on_error, parent)
+    busy.begin()
+    return FutureWatcher(future, on_result, on_error, parent, on_finished=busy.end)
+
+
+class BusyIndicator(QProgressBar):
+    """Thin indeterminate progress bar shown while requests are in flight."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setRange(0, 0)
+        self.setTextVisible(False)
+        self.setFixedHeight(6)
+        self.setStyleSheet(
+            "QProgressBar { border: none; background: #DBEAFE; border-radius: 3px; }"
+            "QProgressBar::chunk { background-color: #3B82F6; border-radius: 3px; }"
+        )
+        self._pending = 0
+        self.setVisible(False)
+
+    def begin(self) -> None:
+        self._pending += 1
+        self.setVisible(True)
+
+    def end(self) -> None:
+        self._pending = max(self._pending - 1, 0)
+        self.setVisible(self._pending > 0)
+
+
+def show_error(parent: QWidget, message: str, error: BaseException) -> None:
+    QMessageBox.warning(parent, "Fehler", f"{message}\n\n{error}")
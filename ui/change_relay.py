@@ -0,0 +1,62 @@
+"""Bring store change events onto the GUI thread, one batch per frame."""
+from __future__ import annotations
+
+import threading
+from typing import List, Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from data.events import ChangeBus, ChangeEvent, ChangeSet
+
+FRAME_MS = 16
+
+
+class ChangeRelay(QObject):
+    """Subscribes to a :class:`ChangeBus` and emits ``changed(ChangeSet)``.
+
+    Events arrive on whichever thread committed them. They are buffered and
+    merged, then delivered on the GUI thread at most once per frame, so a burst
+    of grants triggers a single targeted refresh in each view.
+    """
+
+    changed = pyqtSignal(object)
+    _arrived = pyqtSignal()
+
+    def __init__(self, bus: ChangeBus, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._pending: List[ChangeEvent] = []
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FRAME_MS)
+        self._timer.timeout.connect(self._deliver)
+        self._arrived.connect(self._schedule)
+        self._unsubscribe = bus.subscribe(self._on_event)
+
+    def _on_event(self, event: ChangeEvent) -> None:
+        # Runs on the committing thread; the queued signal hops to the GUI thread.
+        with self._lock:
+            self._pending.append(event)
+            first = len(self._pending) == 1
+        if first:
+            try:
+                self._arrived.emit()
+            except RuntimeError:
+                pass  # The relay was destroyed while the store kept running.
+
+    @pyqtSlot()
+    def _schedule(self) -> None:
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @pyqtSlot()
+    def _deliver(self) -> None:
+        with self._lock:
+            events, self._pending = self._pending, []
+        changes = ChangeSet.from_events(events)
+        if changes:
+            self.changed.emit(changes)
+
+    def close(self) -> None:
+        self._unsubscribe()
+        self._timer.stop()
@@ -0,0 +1,100 @@
+"""Header bar with the class-wide XP milestone progress."""
+from __future__ import annotations
+
+from typing import Optional
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QFrame, QHBoxLayout, QLabel, QProgressBar, QVBoxLayout, QWidget
+
+from data.events import ChangeSet
+from data.models import ClassProgress
+from data.worker import AsyncDataStore
+from ui.async_tasks import run_async
+from ui.theme import FONT_SIZES, make_font
+from ui.vector_assets import BADGE_SVGS, SvgIcon
+
+
+def format_number(value: int) -> str:
+    """German digit grouping, e.g. ``12.500``."""
+    return f"{value:,}".replace(",", ".")
+
+
+class ClassProgressHeader(QFrame):
+    """Shows the stars the whole class has collected and the way to the next one.
+
+    The total is read from the stored aggregate, a single-row lookup, whenever
+    a change touches students; overlapping refreshes are coalesced.
+    """
+
+    def __init__(self, worker: AsyncDataStore, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.worker = worker
+        self._loading = False
+        self._stale = False
+        self.setObjectName("classProgressHeader")
+        self.setStyleSheet(
+            "#classProgressHeader { background-color: #ECFDF5; border: 1px solid #D1FAE5; border-radius: 16px; }"
+        )
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(24, 12, 24, 12)
+        layout.setSpacing(24)
+
+        text_column = QVBoxLayout()
+        title = QLabel("Klassen-XP")
+        title.setFont(make_font(FONT_SIZES["subheading"], bold=True))
+        self.summary_label = QLabel()
+        self.summary_label.setFont(make_font(FONT_SIZES["caption"]))
+        text_column.addWidget(title)
+        text_column.addWidget(self.summary_label)
+        layout.addLayout(text_column)
+
+        self.progress = QProgressBar()
+        self.progress.setTextVisible(False)
+        self.progress.setStyleSheet(
+            "QProgressBar { border-radius: 8px; height: 16px; background-color: #D1FAE5; }"
+            "QProgressBar::chunk { background-color: #10B981; border-radius: 8px; }"
+        )
+        layout.addWidget(self.progress, stretch=1)
+
+        self.star_icon = SvgIcon(BADGE_SVGS["star"])
+        self.star_icon.setFixedSize(40, 40)
+        self.stars_label = QLabel("0")
+        self.stars_label.setFont(make_font(FONT_SIZES["heading"], bold=True))
+        self.stars_label.setStyleSheet("color: #047857;")
+        layout.addWidget(self.star_icon, alignment=Qt.AlignVCenter)
+        layout.addWidget(self.stars_label, alignment=Qt.AlignVCenter)
+
+        self.set_progress(ClassProgress.from_total(0))
+
+    def refresh(self) -> None:
+        if self._loading:
+            self._stale = True
+            return
+        self._loading = True
+        run_async(self.worker.class_progress(), self._loaded, self._failed, self)
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        if changes.student_ids or changes.added_student_ids:
+            self.refresh()
+
+    def _loaded(self, progress: ClassProgress) -> None:
+        self._loading = False
+        self.set_progress(progress)
+        if self._stale:
+            self._stale = False
+            self.refresh()
+
+    def _failed(self, _error: BaseException) -> None:
+        # The header is informational; the next change triggers another attempt.
+        self._loading = self._stale = False
+
+    def set_progress(self, progress: ClassProgress) -> None:
+        self.progress.setRange(0, progress.step)
+        self.progress.setValue(progress.step_xp)
+        self.stars_label.setText(format_number(progress.stars))
+        self.summary_label.setText(
+            f"{format_number(progress.step_xp)} / {format_number(progress.step)} XP – "
+            f"noch {format_number(progress.remaining_xp)} XP bis zum nächsten Stern"
+        )
+        self.setToolTip(f"Insgesamt {format_number(progress.total_xp)} XP gesammelt")
@@ -0,0 +1,180 @@
+"""In-app diagnostics panel for the opt-in instrumentation."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QDoubleSpinBox,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from data import instrumentation
+from data.store import DataStore
+from ui.theme import FONT_SIZES, make_font
+
+REFRESH_MS = 1000
+TIMING_HEADERS = ["Vorgang", "Aufrufe", "Zeilen", "Ø ms", "Max ms", "Gesamt ms"]
+
+
+def _item(value: object, numeric: bool = False) -> QTableWidgetItem:
+    item = QTableWidgetItem()
+    if numeric:
+        item.setData(Qt.DisplayRole, value)
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    else:
+        item.setText(str(value))
+    return item
+
+
+def _make_table(headers: Sequence[str]) -> QTableWidget:
+    table = QTableWidget(0, len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.setSortingEnabled(True)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    table.horizontalHeader().setStretchLastSection(True)
+    return table
+
+
+def _fill_timings(table: QTableWidget, stats: Dict[str, Dict[str, float]]) -> None:
+    table.setSortingEnabled(False)
+    table.setRowCount(len(stats))
+    for row, (name, timing) in enumerate(stats.items()):
+        values = [timing["count"], timing["rows"], timing["mean_ms"], timing["max_ms"], timing["total_ms"]]
+        table.setItem(row, 0, _item(name))
+        for column, value in enumerate(values, start=1):
+            table.setItem(row, column, _item(value, numeric=True))
+    table.setSortingEnabled(True)
+
+
+class DiagnosticsDialog(QDialog):
+    """Shows store, commit and UI timings plus the slow-query log.
+
+    Measuring starts with the checkbox (or ``CLASSQUEST_DIAGNOSTICS=1``) and
+    stops again when it is cleared; the report can be saved as JSON.
+    """
+
+    def __init__(self, store: DataStore, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("Diagnose")
+        self.resize(900, 560)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.enabled_box = QCheckBox("Messung aktiv")
+        self.enabled_box.setChecked(instrumentation.active() is not None)
+        self.enabled_box.toggled.connect(self._set_enabled)
+        controls.addWidget(self.enabled_box)
+        controls.addStretch(1)
+        controls.addWidget(QLabel("Langsame Abfragen ab"))
+        self.threshold = QDoubleSpinBox()
+        self.threshold.setRange(0.0, 10000.0)
+        self.threshold.setSuffix(" ms")
+        active = instrumentation.active()
+        self.threshold.setValue(active.slow_query_ms if active is not None else 50.0)
+        self.threshold.valueChanged.connect(self._set_threshold)
+        controls.addWidget(self.threshold)
+        layout.addLayout(controls)
+
+        self.commit_label = QLabel()
+        self.commit_label.setFont(make_font(FONT_SIZES["body"], bold=True))
+        layout.addWidget(self.commit_label)
+
+        self.store_table = _make_table(TIMING_HEADERS)
+        self.ui_table = _make_table(TIMING_HEADERS)
+        self.slow_table = _make_table(["Zeitpunkt", "Vorgang", "Dauer ms", "SQL"])
+        pages = QTabWidget()
+        pages.addTab(self.store_table, "Datenzugriff")
+        pages.addTab(self.ui_table, "Oberfläche")
+        pages.addTab(self.slow_table, "Langsame Abfragen")
+        layout.addWidget(pages, stretch=1)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        reset_button = QPushButton("Zurücksetzen")
+        reset_button.clicked.connect(self._reset)
+        export_button = QPushButton("Als JSON exportieren …")
+        export_button.clicked.connect(self._export)
+        buttons.addButton(reset_button, QDialogButtonBox.ResetRole)
+        buttons.addButton(export_button, QDialogButtonBox.ActionRole)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def showEvent(self, event) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self._timer.start()
+
+    def hideEvent(self, event) -> None:  # type: ignore[override]
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def _set_enabled(self, enabled: bool) -> None:
+        if enabled:
+            instrumentation.enable(self.store, self.threshold.value())
+        else:
+            instrumentation.disable()
+        self.refresh()
+
+    def _set_threshold(self, value: float) -> None:
+        active = instrumentation.active()
+        if active is not None:
+            active.slow_query_ms = value
+
+    def _reset(self) -> None:
+        active = instrumentation.active()
+        if active is not None:
+            active.reset()
+        self.refresh()
+
+    def _export(self) -> None:
+        active = instrumentation.active()
+        if active is None:
+            return
+        default_name = f"classquest-diagnose-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Diagnosebericht speichern", default_name, "JSON (*.json)")
+        if path:
+            active.export_json(path)
+
+    def refresh(self) -> None:
+        active = instrumentation.active()
+        if active is None:
+            self.commit_label.setText("Messung ist ausgeschaltet.")
+            for table in (self.store_table, self.ui_table, self.slow_table):
+                table.setRowCount(0)
+            return
+        report = active.report()
+        commits = report["commits"]
+        self.commit_label.setText(
+            f"Commits: {commits['count']} · Ø {commits['mean_ms']:.2f} ms · max {commits['max_ms']:.2f} ms"
+        )
+        _fill_timings(self.store_table, report["methods"])
+        _fill_timings(self.ui_table, report["ui"])
+        slow: List[Dict[str, Any]] = report["slow_queries"]
+        self.slow_table.setSortingEnabled(False)
+        self.slow_table.setRowCount(len(slow))
+        for row, entry in enumerate(reversed(slow)):
+            self.slow_table.setItem(row, 0, _item(entry["at"]))
+            self.slow_table.setItem(row, 1, _item(entry["method"]))
+            self.slow_table.setItem(row, 2, _item(entry["duration_ms"], numeric=True))
+            self.slow_table.setItem(row, 3, _item(entry["sql"]))
+        self.slow_table.setSortingEnabled(True)
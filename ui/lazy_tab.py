@@ -0,0 +1,44 @@
+"""Tab page placeholder that builds its real content on first use."""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from data.instrumentation import ui_finished, ui_started
+from ui.theme import FONT_SIZES, make_font
+
+
+class LazyTab(QWidget):
+    """Shows a light placeholder until :meth:`ensure_built` runs ``factory``.
+
+    The real tab, and with it every store query it starts, is created only
+    when the page is first activated or warmed up in the background.
+    """
+
+    def __init__(self, factory: Callable[[], QWidget], parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._factory = factory
+        self.content: Optional[QWidget] = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QLabel("Wird geladen …")
+        self._placeholder.setFont(make_font(FONT_SIZES["body"], bold=True))
+        self._placeholder.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self._placeholder)
+
+    @property
+    def is_built(self) -> bool:
+        return self.content is not None
+
+    def ensure_built(self) -> QWidget:
+        if self.content is None:
+            started = ui_started()
+            self.content = self._factory()
+            ui_finished(f"tab.build.{type(self.content).__name__}", started)
+            self.layout().removeWidget(self._placeholder)
+            self._placeholder.deleteLater()
+            self.layout().addWidget(self.content)
+        return self.content
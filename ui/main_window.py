@@ -1,38 +1,181 @@
 """Main window wiring all redesigned tabs together."""
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QApplication, QMainWindow, QShortcut, QTabWidget, QVBoxLayout, QWidget
 
+from data import instrumentation
+from data.models import Badge
+from data.rules import default_rules
 from data.store import DataStore
+from data.worker import AsyncDataStore
+from ui.async_tasks import run_async, show_error
+from ui.change_relay import ChangeRelay
+from ui.class_progress import ClassProgressHeader
+from ui.diagnostics import DiagnosticsDialog
+from ui.lazy_tab import LazyTab
 from ui.rewards_tab import RewardsTab
+from ui.roster_model import RosterModel
 from ui.students_tab import StudentsTab
 from ui.theme import apply_global_palette
 from ui.trophy_cabinet import TrophyCabinetTab
+from ui.vector_assets import AVATAR_SVG, BADGE_SVGS, prewarm_badge_icons, render_cache
+
+# The class XP total is cross-checked against the roster this often.
+CLASS_PROGRESS_CHECK_MS = 10 * 60 * 1000
 
 
 class MainWindow(QMainWindow):
+    firstPainted = pyqtSignal()
+
     def __init__(self, store: Optional[DataStore] = None) -> None:
         super().__init__()
         self.setWindowTitle("ClassQuest – Kinderfreundliches Dashboard")
         self.resize(1280, 800)
 
         self.store = store or DataStore(Path("classquest.db"))
+        if os.environ.get("CLASSQUEST_DIAGNOSTICS", "0") not in ("", "0"):
+            instrumentation.enable(self.store, float(os.environ.get("CLASSQUEST_SLOW_QUERY_MS", "50")))
+        self.worker = AsyncDataStore(self.store)
+        # Seeding and rule backfill run in order on the writer thread, off the GUI thread.
+        run_async(
+            self.worker.submit_write(self._seed_demo_data),
+            lambda _seeded: None,
+            lambda error: show_error(self, "Die Beispieldaten konnten nicht angelegt werden.", error),
+            self,
+        )
+        # Rule backfill can touch every student, so it runs on the writer thread.
+        run_async(
+            self.worker.submit_write(self._register_badge_rules),
+            lambda _badges: None,
+            lambda error: show_error(self, "Orden-Regeln konnten nicht geladen werden.", error),
+            self,
+        )
 
+        self.class_progress = ClassProgressHeader(self.worker)
         self.tabs = QTabWidget()
-        self.setCentralWidget(self.tabs)
+        central = QWidget()
+        central_layout = QVBoxLayout(central)
+        central_layout.addWidget(self.class_progress)
+        central_layout.addWidget(self.tabs, stretch=1)
+        self.setCentralWidget(central)
+
+        # One roster model backs every student list, so updates reach all tabs.
+        self.roster = RosterModel(self.worker, self)
+        self._roster_requested = False
+
+        # Every tab follows commits made anywhere through targeted refreshes.
+        self.changes = ChangeRelay(self.store.events, self)
+        self.changes.changed.connect(self.roster.apply_changes)
+        self.changes.changed.connect(self.class_progress.apply_changes)
+        self.class_progress.refresh()
+        self._progress_check = QTimer(self)
+        self._progress_check.setInterval(CLASS_PROGRESS_CHECK_MS)
+        self._progress_check.timeout.connect(self._check_class_progress)
+        self._progress_check.start()
+
+        # Tabs are built on first activation; the rest are warmed after first paint.
+        self.students_tab: Optional[StudentsTab] = None
+        self.trophy_tab: Optional[TrophyCabinetTab] = None
+        self.rewards_tab: Optional[RewardsTab] = None
+        self.tabs.addTab(LazyTab(self._build_students_tab), "Schüler:innen")
+        self.tabs.addTab(LazyTab(self._build_trophy_tab), "Trophäenschrank")
+        self.tabs.addTab(LazyTab(self._build_rewards_tab), "Belohnungen")
+        self._painted = False
+        self.tabs.currentChanged.connect(self._activate_tab)
+        self._activate_tab(self.tabs.currentIndex())
+
+        self._diagnostics: Optional[DiagnosticsDialog] = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
+
+    def _activate_tab(self, index: int) -> None:
+        page = self.tabs.widget(index)
+        if isinstance(page, LazyTab):
+            page.ensure_built()
+
+    def show_diagnostics(self) -> None:
+        if self._diagnostics is None:
+            self._diagnostics = DiagnosticsDialog(self.store, self)
+        self._diagnostics.show()
+        self._diagnostics.raise_()
+
+    def _load_roster(self) -> None:
+        if not self._roster_requested:
+            self._roster_requested = True
+            self.roster.reload()
+
+    def _build_students_tab(self) -> StudentsTab:
+        self.students_tab = StudentsTab(self.store, self.worker, self.roster)
+        self._load_roster()
+        return self.students_tab
+
+    def _build_trophy_tab(self) -> TrophyCabinetTab:
+        self.trophy_tab = TrophyCabinetTab(self.store, self.worker)
+        self.changes.changed.connect(self.trophy_tab.model.apply_changes)
+        return self.trophy_tab
+
+    def _build_rewards_tab(self) -> RewardsTab:
+        self.rewards_tab = RewardsTab(self.store, self.worker, self.roster)
+        self.changes.changed.connect(self.rewards_tab.apply_changes)
+        self._load_roster()
+        return self.rewards_tab
+
+    def paintEvent(self, event) -> None:  # type: ignore[override]
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.firstPainted.emit()
+            QTimer.singleShot(0, self._warm_up)
+
+    def _warm_up(self) -> None:
+        """Build the hidden tabs one per event-loop turn so input stays responsive."""
+        self._prewarm_badge_icons()
+        pending = [self.tabs.widget(index) for index in range(self.tabs.count())]
+        self._warm_next([page for page in pending if isinstance(page, LazyTab) and not page.is_built])
+
+    def _warm_next(self, pages: List[LazyTab]) -> None:
+        if pages:
+            pages[0].ensure_built()
+            QTimer.singleShot(0, lambda: self._warm_next(pages[1:]))
+
+    def _seed_demo_data(self) -> None:
+        """Add a first student to an empty database; runs on the writer thread."""
+        if self.store.has_students():
+            return
+        self.store.add_student("Alex Abenteuer", AVATAR_SVG)
+        self.store.ensure_default_rewards()
+
+    def _register_badge_rules(self) -> List[Badge]:
+        rewards = self.store.ensure_default_rewards()
+        rules = [rule for rule in default_rules(rewards, BADGE_SVGS) if rule.key not in self.store.rules]
+        return self.store.add_badge_rules(rules)
+
+    def _check_class_progress(self) -> None:
+        run_async(self.worker.check_class_progress(), self._class_progress_checked, parent=self)
 
-        self.students_tab = StudentsTab(self.store)
-        self.trophy_tab = TrophyCabinetTab(self.store)
-        self.rewards_tab = RewardsTab(self.store)
+    def _class_progress_checked(self, drift: int) -> None:
+        if drift:
+            self.class_progress.refresh()
 
-        self.tabs.addTab(self.students_tab, "Schüler:innen")
-        self.tabs.addTab(self.trophy_tab, "Trophäenschrank")
-        self.tabs.addTab(self.rewards_tab, "Belohnungen")
+    def _prewarm_badge_icons(self) -> None:
+        prewarm_badge_icons(self.devicePixelRatioF())
 
     def closeEvent(self, event) -> None:  # type: ignore[override]
+        self._progress_check.stop()
+        self.store.flush()
+        self.worker.shutdown(wait=True)
+        self.changes.close()
+        render_cache.stop_prewarm()
+        report_path = os.environ.get("CLASSQUEST_DIAGNOSTICS_REPORT")
+        active = instrumentation.active()
+        if active is not None and report_path:
+            active.export_json(report_path)
+        instrumentation.disable()
         self.store.close()
         super().closeEvent(event)
 
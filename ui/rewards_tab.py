@@ -1,14 +1,15 @@
 """Rewards tab for granting XP using large buttons."""
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
+    QAbstractItemView,
     QGridLayout,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QLineEdit,
+    QListView,
     QMessageBox,
     QPushButton,
     QSplitter,
@@ -16,15 +17,24 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-from data.models import Reward
+from data.events import ChangeSet
+from data.instrumentation import ui_timed
+from data.models import Reward, Student
 from data.store import DataStore
+from data.worker import AsyncDataStore
+from ui.async_tasks import BusyIndicator, run_async, show_error
+from ui.roster_model import CheckableRosterProxy, RosterFilterProxy, RosterModel
 from ui.theme import FONT_SIZES, button_style, make_font
 
 
 class RewardsTab(QWidget):
-    def __init__(self, store: DataStore, parent: Optional[QWidget] = None) -> None:
+    def __init__(
+        self, store: DataStore, worker: AsyncDataStore, roster: RosterModel, parent: Optional[QWidget] = None
+    ) -> None:
         super().__init__(parent)
         self.store = store
+        self.worker = worker
+        self.roster = roster
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -34,6 +44,11 @@ class RewardsTab(QWidget):
         header.setFont(make_font(FONT_SIZES["heading"], bold=True))
         layout.addWidget(header)
 
+        self.busy = BusyIndicator()
+        layout.addWidget(self.busy)
+        roster.loadStarted.connect(self.busy.begin)
+        roster.loadFinished.connect(self.busy.end)
+
         splitter = QSplitter(Qt.Horizontal)
         splitter.setChildrenCollapsible(False)
         layout.addWidget(splitter, stretch=1)
@@ -46,8 +61,20 @@ class RewardsTab(QWidget):
         left_label.setFont(make_font(FONT_SIZES["body"], bold=True))
         left_layout.addWidget(left_label)
 
-        self.student_list = QListWidget()
-        self.student_list.setSelectionMode(QListWidget.MultiSelection)
+        self.checkable_roster = CheckableRosterProxy(roster, self)
+        # Checks are kept by student ID, so students hidden by a search stay checked.
+        self.filtered_roster = RosterFilterProxy(self.checkable_roster, roster, self)
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText("🔍 Name oder Orden suchen …")
+        self.search_field.setClearButtonEnabled(True)
+        self.search_field.setFont(make_font(FONT_SIZES["body"]))
+        self.search_field.textChanged.connect(self.filtered_roster.set_query)
+        left_layout.addWidget(self.search_field)
+
+        self.student_list = QListView()
+        self.student_list.setModel(self.filtered_roster)
+        self.student_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.student_list.setUniformItemSizes(True)
         left_layout.addWidget(self.student_list)
 
         splitter.addWidget(left_container)
@@ -64,28 +91,41 @@ class RewardsTab(QWidget):
         self.button_grid.setSpacing(24)
         right_layout.addLayout(self.button_grid)
 
+        # Success feedback is non-modal so several rewards can be clicked in a row.
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.setFont(make_font(FONT_SIZES["body"], bold=True))
+        right_layout.addWidget(self.status_label)
+
         splitter.addWidget(right_container)
         splitter.setStretchFactor(0, 1)
         splitter.setStretchFactor(1, 1)
 
         layout.addStretch(1)
 
-        self._load_students()
         self._load_rewards()
 
-    def _load_students(self) -> None:
-        self.student_list.clear()
-        for student in self.store.list_students():
-            item = QListWidgetItem(student.display_name)
-            item.setData(Qt.UserRole, student.student_id)
-            item.setFlags(item.flags() | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
-            item.setCheckState(Qt.Unchecked)
-            item.setFont(make_font(20, bold=True))
-            self.student_list.addItem(item)
-
     def _load_rewards(self) -> None:
-        self.store.ensure_default_rewards()
-        rewards = self.store.list_rewards()
+        run_async(
+            self.worker.ensure_default_rewards(),
+            self._populate_rewards,
+            lambda error: show_error(self, "Belohnungen konnten nicht geladen werden.", error),
+            self,
+            self.busy,
+        )
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        if changes.reward_ids:
+            run_async(
+                self.worker.list_rewards(),
+                self._populate_rewards,
+                lambda error: show_error(self, "Belohnungen konnten nicht geladen werden.", error),
+                self,
+                self.busy,
+            )
+
+    @ui_timed("rewards.populate")
+    def _populate_rewards(self, rewards: List[Reward]) -> None:
         while self.button_grid.count():
             item = self.button_grid.takeAt(0)
             widget = item.widget()
@@ -100,25 +140,22 @@ class RewardsTab(QWidget):
             col = index % 2
             self.button_grid.addWidget(button, row, col)
 
-    def _selected_student_ids(self) -> List[int]:
-        ids: List[int] = []
-        for row in range(self.student_list.count()):
-            item = self.student_list.item(row)
-            if item.checkState() == Qt.Checked:
-                student_id = item.data(Qt.UserRole)
-                if student_id is not None:
-                    ids.append(int(student_id))
-        return ids
-
     def _grant_reward(self, reward: Reward) -> None:
-        student_ids = self._selected_student_ids()
+        student_ids = self.checkable_roster.checked_ids()
         if not student_ids:
             QMessageBox.information(self, "Hinweis", "Bitte wähle mindestens eine:n Schüler:in aus.")
             return
-        updated_students = self.store.bulk_grant_xp(student_ids, reward.xp_amount)
-        self._load_students()
-        QMessageBox.information(
+        # Queued grants from quick successive clicks share one commit.
+        run_async(
+            self.store.queue_grant_xp(student_ids, reward.xp_amount, reward.reward_id),
+            lambda students: self._on_reward_granted(reward, students),
+            lambda error: show_error(self, "Die XP konnten nicht vergeben werden.", error),
             self,
-            "Erfolg",
-            f"{len(updated_students)} Schüler:innen haben '{reward.label}' und {reward.xp_amount} XP erhalten!",
+            self.busy,
+        )
+
+    def _on_reward_granted(self, reward: Reward, updated_students: List[Student]) -> None:
+        # The roster rows themselves are refreshed through the change relay.
+        self.status_label.setText(
+            f"✅ {len(updated_students)} Schüler:innen haben '{reward.label}' und {reward.xp_amount} XP erhalten!"
         )
@@ -0,0 +1,274 @@
+"""Roster model shared by every tab that lists students."""
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from PyQt5.QtCore import (
+    QAbstractItemModel,
+    QAbstractListModel,
+    QIdentityProxyModel,
+    QModelIndex,
+    QObject,
+    QSortFilterProxyModel,
+    Qt,
+    pyqtSignal,
+)
+
+from data.events import ChangeSet
+from data.instrumentation import ui_finished, ui_started, ui_timed
+from data.models import Student, StudentSummary
+from data.worker import AsyncDataStore
+from ui.async_tasks import FutureWatcher
+from ui.theme import make_font
+
+
+class RosterModel(QAbstractListModel):
+    """Students sorted by name, loaded once and patched row by row afterwards.
+
+    :meth:`apply_students` updates only the rows of the students passed in and
+    emits ``dataChanged`` for exactly those rows, so views keep their scroll
+    position, selection and check state.
+    """
+
+    StudentIdRole = Qt.UserRole + 1
+    SummaryRole = Qt.UserRole + 2
+
+    loadStarted = pyqtSignal()
+    loadFinished = pyqtSignal()
+    loadFailed = pyqtSignal(object)
+
+    def __init__(self, worker: AsyncDataStore, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.worker = worker
+        self._rows: List[StudentSummary] = []
+        self._row_of: Dict[int, int] = {}
+        self._generation = 0
+        self._loading = False
+        self._loaded = False
+        self._font = make_font(20, bold=True)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        summary = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return summary.display_name
+        if role == Qt.FontRole:
+            return self._font
+        if role == self.StudentIdRole:
+            return summary.student_id
+        if role == self.SummaryRole:
+            return summary
+        return None
+
+    def row_of(self, student_id: int) -> Optional[int]:
+        return self._row_of.get(student_id)
+
+    def student_id(self, row: int) -> Optional[int]:
+        return self._rows[row].student_id if 0 <= row < len(self._rows) else None
+
+    def __contains__(self, student_id: int) -> bool:
+        return student_id in self._row_of
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a full load has arrived and none is in flight."""
+        return self._loaded and not self._loading
+
+    def reload(self) -> None:
+        """Fetch the whole roster again; replaces every row once it arrives."""
+        self._generation += 1
+        generation = self._generation
+        self._loading = True
+        self.loadStarted.emit()
+        started = ui_started()
+        FutureWatcher(
+            self.worker.list_roster(),
+            lambda rows: self._reset(generation, rows, started),
+            lambda error: self._fail(generation, error),
+            self,
+            on_finished=self.loadFinished.emit,
+        )
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """Re-read only the rows named by ``changes`` and patch them in."""
+        if changes.added_student_ids or (self._loading and changes.student_ids):
+            # New rows need a full load; a load already in flight may predate the change.
+            self.reload()
+            return
+        ids = [student_id for student_id in changes.student_ids if student_id in self._row_of]
+        if not ids:
+            return
+        generation = self._generation
+        FutureWatcher(
+            self.worker.list_roster(ids),
+            lambda rows: self._patch(generation, rows),
+            lambda error: self._fail(generation, error),
+            self,
+        )
+
+    def _patch(self, generation: int, rows: List[StudentSummary]) -> None:
+        if generation == self._generation:
+            self.apply_students(rows)
+
+    def _reset(self, generation: int, rows: List[StudentSummary], started: Optional[float] = None) -> None:
+        if generation != self._generation:
+            return  # A newer reload is already on its way.
+        self._loading = False
+        self._loaded = True
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._row_of = {summary.student_id: row for row, summary in enumerate(self._rows)}
+        self.endResetModel()
+        ui_finished("roster.reload", started)
+
+    def _fail(self, generation: int, error: BaseException) -> None:
+        if generation == self._generation:
+            self._loading = False
+            self.loadFailed.emit(error)
+
+    @ui_timed("roster.patch")
+    def apply_students(self, students: Iterable[Union[Student, StudentSummary]]) -> None:
+        """Patch the rows of ``students`` in place and announce only those rows.
+
+        A rename or an unknown student changes the sort order or row count, so
+        that case falls back to a full :meth:`reload`.
+        """
+        changed: List[int] = []
+        for student in students:
+            row = self._row_of.get(student.student_id)
+            if row is None or self._rows[row].display_name != student.display_name:
+                self.reload()
+                return
+            current = self._rows[row]
+            updated = replace(current, xp=student.xp, level=student.level, class_name=student.class_name)
+            if isinstance(student, StudentSummary):
+                updated = replace(updated, badge_count=student.badge_count)
+            if updated != current:
+                self._rows[row] = updated
+                changed.append(row)
+        for first, last in _contiguous_ranges(changed):
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+
+def _contiguous_ranges(rows: List[int]) -> Iterator[Tuple[int, int]]:
+    """Group row numbers into ``(first, last)`` runs so each run is one signal."""
+    run_start = previous = None
+    for row in sorted(set(rows)):
+        if previous is not None and row == previous + 1:
+            previous = row
+            continue
+        if run_start is not None:
+            yield run_start, previous
+        run_start = previous = row
+    if run_start is not None:
+        yield run_start, previous
+
+
+class CheckableRosterProxy(QIdentityProxyModel):
+    """Adds per-student check boxes on top of a :class:`RosterModel`.
+
+    Checked students are kept as a set of ids, so reading or toggling the
+    selection costs O(checked) rather than a scan over every row, and the
+    state survives reloads of the underlying roster.
+    """
+
+    checkedChanged = pyqtSignal()
+
+    def __init__(self, roster: RosterModel, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.setSourceModel(roster)
+        self._roster = roster
+        self._checked: Set[int] = set()
+        roster.modelReset.connect(self._prune_checked)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:  # type: ignore[override]
+        return super().flags(index) | Qt.ItemIsUserCheckable | Qt.ItemIsEnabled
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if role == Qt.CheckStateRole and index.isValid():
+            student_id = super().data(index, RosterModel.StudentIdRole)
+            return Qt.Checked if student_id in self._checked else Qt.Unchecked
+        return super().data(index, role)
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:  # type: ignore[override]
+        if role != Qt.CheckStateRole or not index.isValid():
+            return super().setData(index, value, role)
+        student_id = super().data(index, RosterModel.StudentIdRole)
+        if Qt.CheckState(value) == Qt.Checked:
+            self._checked.add(student_id)
+        else:
+            self._checked.discard(student_id)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.checkedChanged.emit()
+        return True
+
+    def checked_ids(self) -> List[int]:
+        return sorted(self._checked)
+
+    def _prune_checked(self) -> None:
+        self._checked = {student_id for student_id in self._checked if student_id in self._roster}
+
+
+class RosterFilterProxy(QSortFilterProxyModel):
+    """Hides the students that do not match a search over the roster index.
+
+    :meth:`set_query` asks :meth:`DataStore.search_students` for the matching
+    IDs in the background and filters by set membership, so typing never
+    reloads the roster. Answers to superseded queries are dropped, and the
+    current query is asked again when the roster changes.
+    """
+
+    filterApplied = pyqtSignal()
+
+    def __init__(self, source: QAbstractItemModel, roster: RosterModel, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.setSourceModel(source)
+        self._roster = roster
+        self._query = ""
+        self._matches: Optional[Set[int]] = None
+        self._generation = 0
+        roster.modelReset.connect(self._requery)
+        roster.dataChanged.connect(self._requery)
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    def set_query(self, text: str) -> None:
+        self._query = text.strip()
+        self._generation += 1
+        if not self._query:
+            self._apply(self._generation, None)
+            return
+        generation = self._generation
+        started = ui_started()
+        FutureWatcher(
+            self._roster.worker.search_students(self._query),
+            lambda ids: self._apply(generation, set(ids), started),
+            lambda error: self._apply(generation, None),
+            self,
+        )
+
+    def _requery(self) -> None:
+        if self._query:
+            self.set_query(self._query)
+
+    def _apply(self, generation: int, matches: Optional[Set[int]], started: Optional[float] = None) -> None:
+        if generation != self._generation:
+            return  # A newer keystroke is already on its way.
+        if matches != self._matches:
+            self._matches = matches
+            self.invalidateFilter()
+        ui_finished("roster.search", started)
+        self.filterApplied.emit()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:  # type: ignore[override]
+        if self._matches is None:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        return index.data(RosterModel.StudentIdRole) in self._matches
@@ -1,17 +1,17 @@
 """Student detail tab with large avatar and progress information."""
 from __future__ import annotations
 
+from concurrent.futures import Future
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtSvg import QSvgWidget
+from PyQt5.QtCore import QModelIndex, Qt
 from PyQt5.QtWidgets import (
     QFrame,
     QGridLayout,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QLineEdit,
+    QListView,
     QProgressBar,
     QPushButton,
     QSplitter,
@@ -20,10 +20,25 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
 )
 
+from data.instrumentation import ui_timed
+from data.leveling import DEFAULT_LEVEL_CURVE, LevelCurve
 from data.models import Badge, Student
 from data.store import DataStore
+from data.worker import AsyncDataStore
+from ui.async_tasks import BusyIndicator, run_async, show_error
+from ui.roster_model import RosterFilterProxy, RosterModel
 from ui.theme import FONT_SIZES, button_style, make_font
-from ui.vector_assets import AVATAR_SVG, BADGE_SVGS
+from ui.vector_assets import AVATAR_SVG, BADGE_ICON_SIZES, BADGE_SVGS, PrewarmHandle, SvgIcon, render_cache
+
+PREFETCH_RADIUS = 1
+
+NO_BADGES_PLACEHOLDER = Badge(
+    badge_id=-1,
+    name="Noch keine Orden",
+    description="Sammle XP, um Orden freizuschalten!",
+    svg_icon=BADGE_SVGS["star"],
+    awarded_at=datetime(1970, 1, 1),
+)
 
 
 class AvatarPanel(QFrame):
@@ -33,15 +48,47 @@ class AvatarPanel(QFrame):
         layout = QVBoxLayout(self)
         layout.setAlignment(Qt.AlignCenter)
 
-        self.avatar_widget = QSvgWidget()
-        self.avatar_widget.load(bytes(AVATAR_SVG, "utf-8"))
+        self.avatar_widget = SvgIcon(AVATAR_SVG)
         self.avatar_widget.setMinimumSize(360, 360)
         self.avatar_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         layout.addWidget(self.avatar_widget, alignment=Qt.AlignCenter)
 
 
+class BadgeCard(QWidget):
+    """Gallery card that can be rebound to another badge instead of rebuilt."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setAlignment(Qt.AlignCenter)
+
+        self.icon = SvgIcon()
+        self.icon.setFixedSize(BADGE_ICON_SIZES["gallery"])
+        layout.addWidget(self.icon, alignment=Qt.AlignCenter)
+
+        self.caption = QLabel()
+        self.caption.setAlignment(Qt.AlignCenter)
+        self.caption.setFont(make_font(FONT_SIZES["body"], bold=True))
+        layout.addWidget(self.caption)
+
+    def bind(self, badge: Badge) -> None:
+        # SvgIcon ignores an unchanged SVG, and the pixmap comes from render_cache.
+        self.icon.set_svg(badge.svg_icon)
+        if self.caption.text() != badge.name:
+            self.caption.setText(badge.name)
+
+
 class BadgeGallery(QWidget):
+    """Three-column badge grid backed by a pool of reusable :class:`BadgeCard`.
+
+    Cards are created only when a student has more badges than any student
+    shown before. Switching students rebinds the existing cards and hides the
+    surplus, so flipping through a class allocates no new widgets.
+    """
+
+    COLUMNS = 3
+
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
         layout = QGridLayout(self)
@@ -49,30 +96,27 @@ class BadgeGallery(QWidget):
         layout.setHorizontalSpacing(24)
         layout.setVerticalSpacing(24)
         self._layout = layout
-
-    def populate(self, badges: List[Badge]) -> None:
-        while self._layout.count():
-            item = self._layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        for index, badge in enumerate(badges):
-            row = index // 3
-            col = index % 3
-            badge_widget = QSvgWidget()
-            badge_widget.load(bytes(badge.svg_icon, "utf-8"))
-            badge_widget.setFixedSize(128, 128)
-            caption = QLabel(badge.name)
-            caption.setAlignment(Qt.AlignCenter)
-            caption.setFont(make_font(FONT_SIZES["body"], bold=True))
-
-            card = QWidget()
-            card_layout = QVBoxLayout(card)
-            card_layout.setAlignment(Qt.AlignCenter)
-            card_layout.addWidget(badge_widget, alignment=Qt.AlignCenter)
-            card_layout.addWidget(caption)
-
-            self._layout.addWidget(card, row, col)
+        self._cards: List[BadgeCard] = []
+
+    def populate(self, badges: Sequence[Badge]) -> None:
+        self.setUpdatesEnabled(False)
+        try:
+            while len(self._cards) < len(badges):
+                card = BadgeCard(self)
+                index = len(self._cards)
+                self._layout.addWidget(card, index // self.COLUMNS, index % self.COLUMNS)
+                self._cards.append(card)
+            for card, badge in zip(self._cards, badges):
+                card.bind(badge)
+                card.setVisible(True)
+            for card in self._cards[len(badges):]:
+                card.setVisible(False)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    @property
+    def pool_size(self) -> int:
+        return len(self._cards)
 
 
 class StudentDetail(QWidget):
@@ -130,30 +174,37 @@ class StudentDetail(QWidget):
         layout = QVBoxLayout(self)
         layout.addWidget(splitter)
 
-    def update_student(self, student: Student) -> None:
+    @ui_timed("students.detail")
+    def update_student(self, student: Student, curve: LevelCurve = DEFAULT_LEVEL_CURVE) -> None:
         self.name_label.setText(student.display_name)
         self.level_label.setText(f"Level {student.level}")
         self.xp_label.setText(f"{student.xp} XP")
-        progress = student.xp % 100
-        self.progress.setValue(progress)
+        progress = curve.progress(student.xp)
+        if progress.xp_for_level is None:
+            self.progress.setRange(0, 1)
+            self.progress.setValue(1)
+        else:
+            self.progress.setRange(0, progress.xp_for_level)
+            self.progress.setValue(progress.xp_into_level)
         if not student.badges:
-            placeholder = Badge(
-                badge_id=-1,
-                name="Noch keine Orden",
-                description="Sammle XP, um Orden freizuschalten!",
-                svg_icon=BADGE_SVGS["star"],
-                awarded_at=datetime.utcnow(),
-            )
-            self.badge_gallery.populate([placeholder])
+            self.badge_gallery.populate([NO_BADGES_PLACEHOLDER])
         else:
             self.badge_gallery.populate(student.badges)
 
 
 class StudentsTab(QWidget):
-    def __init__(self, store: DataStore, parent: Optional[QWidget] = None) -> None:
+    def __init__(
+        self, store: DataStore, worker: AsyncDataStore, roster: RosterModel, parent: Optional[QWidget] = None
+    ) -> None:
         super().__init__(parent)
         self.store = store
+        self.worker = worker
+        self.roster = roster
         self.current_student: Optional[Student] = None
+        self._selected_id: Optional[int] = None
+        # Neighbours of the current row, hydrated and pre-rendered in the background.
+        self._prefetched: Dict[int, Student] = {}
+        self._prefetches: Dict[int, Tuple[Future, Optional[PrewarmHandle]]] = {}
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -163,10 +214,31 @@ class StudentsTab(QWidget):
         header.setFont(make_font(FONT_SIZES["heading"], bold=True))
         layout.addWidget(header)
 
-        self.student_list = QListWidget()
+        self.busy = BusyIndicator()
+        layout.addWidget(self.busy)
+        roster.loadStarted.connect(self.busy.begin)
+        roster.loadFinished.connect(self.busy.end)
+        roster.loadFailed.connect(self._show_load_error)
+
+        self.filtered_roster = RosterFilterProxy(roster, roster, self)
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText("🔍 Name oder Orden suchen …")
+        self.search_field.setClearButtonEnabled(True)
+        self.search_field.setFont(make_font(FONT_SIZES["body"]))
+        self.search_field.textChanged.connect(self.filtered_roster.set_query)
+        layout.addWidget(self.search_field)
+
+        self.student_list = QListView()
+        self.student_list.setModel(self.filtered_roster)
         self.student_list.setSpacing(12)
         self.student_list.setFixedHeight(140)
-        self.student_list.itemSelectionChanged.connect(self._on_selection_changed)
+        self.student_list.setUniformItemSizes(True)
+        self.student_list.selectionModel().currentChanged.connect(self._on_current_changed)
+        # Connected after setModel so the view has reset itself before we reselect.
+        roster.modelReset.connect(self._drop_prefetches)
+        roster.modelReset.connect(self._restore_selection)
+        roster.dataChanged.connect(self._on_rows_changed)
+        self.filtered_roster.filterApplied.connect(self._restore_selection)
         layout.addWidget(self.student_list)
 
         self.detail = StudentDetail()
@@ -177,37 +249,100 @@ class StudentsTab(QWidget):
         self.refresh_button.clicked.connect(self.reload_students)
         layout.addWidget(self.refresh_button, alignment=Qt.AlignRight)
 
-        self.reload_students()
-
     def reload_students(self) -> None:
-        students = self.store.list_students()
-        if not students:
-            demo_student = self.store.add_student("Alex Abenteuer", AVATAR_SVG)
-            self.store.ensure_default_rewards()
-            students = [self.store.get_student(demo_student.student_id)]  # type: ignore[list-item]
-
-        self.student_list.clear()
-        for student in students:
-            if student is None:
-                continue
-            item = QListWidgetItem(student.display_name)
-            item.setData(Qt.UserRole, student.student_id)
-            font = make_font(20, bold=True)
-            item.setFont(font)
-            self.student_list.addItem(item)
-
-        if students:
-            self.student_list.setCurrentRow(0)
-
-    def _on_selection_changed(self) -> None:
-        selected_items = self.student_list.selectedItems()
-        if not selected_items:
-            return
-        student_id = selected_items[0].data(Qt.UserRole)
+        self.roster.reload()
+
+    def _restore_selection(self) -> None:
+        """Keep the previously shown student selected across roster reloads and searches.
+
+        If the search hides that student, the first match is shown instead.
+        """
+        row = self.roster.row_of(self._selected_id) if self._selected_id is not None else None
+        current = self.filtered_roster.mapFromSource(self.roster.index(row)) if row is not None else QModelIndex()
+        if not current.isValid() and self.filtered_roster.rowCount():
+            current = self.filtered_roster.index(0, 0)
+        if current.isValid() and current != self.student_list.currentIndex():
+            self.student_list.setCurrentIndex(current)
+
+    def _visible_student_id(self, row: int) -> Optional[int]:
+        index = self.filtered_roster.index(row, 0)
+        return index.data(RosterModel.StudentIdRole) if index.isValid() else None
+
+    def _show_load_error(self, error: BaseException) -> None:
+        show_error(self, "Schüler:innen konnten nicht geladen werden.", error)
+
+    def _on_current_changed(self, current: QModelIndex, _previous: QModelIndex) -> None:
+        student_id = current.data(RosterModel.StudentIdRole)
         if student_id is None:
             return
-        student = self.store.get_student(student_id)
-        if student is None:
+        self._selected_id = student_id
+        prefetched = self._prefetched.get(student_id)
+        if prefetched is not None:
+            self._show_student(prefetched)
+        else:
+            self._load_student(student_id)
+        self._prefetch_around(current.row())
+
+    def _on_rows_changed(self, first: QModelIndex, last: QModelIndex) -> None:
+        for row in range(first.row(), last.row() + 1):
+            student_id = self.roster.student_id(row)
+            if student_id is not None:
+                self._prefetched.pop(student_id, None)
+        row = self.roster.row_of(self._selected_id) if self._selected_id is not None else None
+        if row is not None and first.row() <= row <= last.row():
+            self._load_student(self._selected_id)
+
+    def _prefetch_around(self, row: int) -> None:
+        """Hydrate and pre-render the rows next to ``row``; cancel the ones left behind."""
+        wanted: Set[int] = set()
+        for offset in range(-PREFETCH_RADIUS, PREFETCH_RADIUS + 1):
+            student_id = self._visible_student_id(row + offset)
+            if student_id is not None:
+                wanted.add(student_id)
+        for student_id in [student_id for student_id in self._prefetches if student_id not in wanted]:
+            self._cancel_prefetch(student_id)
+        self._prefetched = {
+            student_id: student for student_id, student in self._prefetched.items() if student_id in wanted
+        }
+        for student_id in wanted - self._prefetches.keys() - self._prefetched.keys():
+            if student_id == self._selected_id:
+                continue
+            future = self.worker.get_student(student_id)
+            self._prefetches[student_id] = (future, None)
+            run_async(future, lambda student, sid=student_id: self._on_prefetched(sid, student), _ignore_error, self)
+
+    def _on_prefetched(self, student_id: int, student: Optional[Student]) -> None:
+        entry = self._prefetches.get(student_id)
+        if entry is None or student is None:
+            return  # Skipped past before it arrived.
+        self._prefetched[student_id] = student
+        handle = render_cache.prewarm(
+            (badge.svg_icon for badge in student.badges or [NO_BADGES_PLACEHOLDER]),
+            [BADGE_ICON_SIZES["gallery"]],
+            self.devicePixelRatioF(),
+        )
+        self._prefetches[student_id] = (entry[0], handle)
+
+    def _cancel_prefetch(self, student_id: int) -> None:
+        future, handle = self._prefetches.pop(student_id)
+        future.cancel()
+        if handle is not None:
+            handle.cancel()
+
+    def _drop_prefetches(self) -> None:
+        for student_id in list(self._prefetches):
+            self._cancel_prefetch(student_id)
+        self._prefetched.clear()
+
+    def _load_student(self, student_id: int) -> None:
+        run_async(self.worker.get_student(student_id), self._show_student, self._show_load_error, self, self.busy)
+
+    def _show_student(self, student: Optional[Student]) -> None:
+        if student is None or student.student_id != self._selected_id:
             return
         self.current_student = student
-        self.detail.update_student(student)
+        self.detail.update_student(student, self.store.level_curve)
+
+
+def _ignore_error(_error: BaseException) -> None:
+    """Prefetch failures are not shown; selecting the row loads it normally."""
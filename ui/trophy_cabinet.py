@@ -1,24 +1,38 @@
-"""Trophy cabinet displaying earned badges as large cards."""
+"""Trophy cabinet displaying earned badges as large cards.
+
+The cabinet is a virtualized model/view: badges are paged in from the worker
+as the user scrolls and only the visible cards are painted.
+"""
 from __future__ import annotations
 
-from typing import List, Optional
+from bisect import bisect_left
+from typing import Any, List, Optional, Set, Tuple
 
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtSvg import QSvgWidget
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, QPointF, QRectF, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFontMetrics, QPainter, QPen
 from PyQt5.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QFrame,
-    QGridLayout,
-    QScrollArea,
-    QVBoxLayout,
     QLabel,
+    QListView,
+    QStackedWidget,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QVBoxLayout,
     QWidget,
 )
 
+from data.events import ChangeSet
+from data.instrumentation import ui_finished, ui_started
 from data.models import Badge
 from data.store import DataStore
-from ui.theme import FONT_SIZES, make_font
+from data.timestamps import to_epoch_micros
+from data.worker import AsyncDataStore
+from ui.async_tasks import BusyIndicator, run_async, show_error
+from ui.theme import COLOR_PALETTE, FONT_SIZES, make_font
+from ui.vector_assets import BADGE_ICON_SIZES, SvgIcon, render_cache
 
 
 class BadgeDetailDialog(QDialog):
@@ -30,9 +44,8 @@ class BadgeDetailDialog(QDialog):
         layout.setContentsMargins(24, 24, 24, 24)
         layout.setSpacing(16)
 
-        svg_widget = QSvgWidget()
-        svg_widget.load(bytes(badge.svg_icon, "utf-8"))
-        svg_widget.setFixedSize(192, 192)
+        svg_widget = SvgIcon(badge.svg_icon)
+        svg_widget.setFixedSize(BADGE_ICON_SIZES["detail"])
         layout.addWidget(svg_widget, alignment=Qt.AlignCenter)
 
         name_label = QLabel(badge.name)
@@ -54,48 +67,229 @@ class BadgeDetailDialog(QDialog):
         layout.addWidget(buttons)
 
 
-class TrophyCard(QFrame):
-    clicked = pyqtSignal(Badge)
+class BadgeListModel(QAbstractListModel):
+    """Badges in cabinet order, fetched page by page from the worker."""
 
-    def __init__(self, badge: Badge, parent: Optional[QWidget] = None) -> None:
+    BadgeRole = Qt.UserRole + 1
+    PAGE_SIZE = 60
+
+    pageLoaded = pyqtSignal()
+    loadFailed = pyqtSignal(object)
+
+    def __init__(self, worker: AsyncDataStore, parent: Optional[QObject] = None) -> None:
         super().__init__(parent)
-        self.badge = badge
-        self.setFrameShape(QFrame.StyledPanel)
-        self.setStyleSheet(
-            "QFrame { background: #FFFFFF; border-radius: 24px; border: 4px solid #DBEAFE; }"
-            "QFrame:hover { border-color: #3B82F6; }"
+        self.worker = worker
+        self.busy: Optional[BusyIndicator] = None
+        self._badges: List[Badge] = []
+        self._ids: Set[int] = set()
+        self._exhausted = False
+        self._fetching = False
+        self._generation = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._badges)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if not index.isValid() or not 0 <= index.row() < len(self._badges):
+            return None
+        badge = self._badges[index.row()]
+        if role == Qt.DisplayRole:
+            return badge.name
+        if role == Qt.ToolTipRole:
+            return badge.description
+        if role == self.BadgeRole:
+            return badge
+        return None
+
+    def badge(self, index: QModelIndex) -> Optional[Badge]:
+        return self.data(index, self.BadgeRole)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._exhausted
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:  # type: ignore[override]
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:  # type: ignore[override]
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        self._fetching = True
+        generation = self._generation
+        after = self._badges[-1] if self._badges else None
+        started = ui_started()
+        run_async(
+            self.worker.list_badges(self.PAGE_SIZE, after),
+            lambda page: self._append(generation, page, started),
+            lambda error: self._fail(generation, error),
+            self,
+            self.busy,
         )
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(24, 24, 24, 24)
-        layout.setSpacing(12)
-        layout.setAlignment(Qt.AlignCenter)
 
-        svg_widget = QSvgWidget()
-        svg_widget.load(bytes(badge.svg_icon, "utf-8"))
-        svg_widget.setFixedSize(160, 160)
-        layout.addWidget(svg_widget, alignment=Qt.AlignCenter)
+    def reload(self) -> None:
+        """Drop every loaded row and start paging again from the newest badge."""
+        self.beginResetModel()
+        self._generation += 1
+        self._badges = []
+        self._ids = set()
+        self._exhausted = False
+        self._fetching = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def _append(self, generation: int, page: List[Badge], started: Optional[float] = None) -> None:
+        if generation != self._generation:
+            return  # Superseded by a reload while the page was loading.
+        self._fetching = False
+        self._exhausted = len(page) < self.PAGE_SIZE
+        if page:
+            first = len(self._badges)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._badges.extend(page)
+            self._ids.update(badge.badge_id for badge in page)
+            self.endInsertRows()
+        self.pageLoaded.emit()
+        ui_finished("trophy.page", started)
+
+    def _fail(self, generation: int, error: BaseException) -> None:
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self.loadFailed.emit(error)
 
-        caption = QLabel(badge.name)
-        caption.setFont(make_font(FONT_SIZES["body"], bold=True))
-        caption.setAlignment(Qt.AlignCenter)
-        layout.addWidget(caption)
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """Insert newly awarded badges at their place instead of reloading."""
+        ids = [badge_id for badge_id in changes.badge_ids if badge_id not in self._ids]
+        if not ids:
+            return
+        generation = self._generation
+        run_async(
+            self.worker.get_badges(ids),
+            lambda badges: self._insert(generation, badges),
+            lambda error: self._fail(generation, error),
+            self,
+        )
+
+    @staticmethod
+    def _order_key(badge: Badge) -> Tuple[int, int]:
+        # Ascending key for the newest-first cabinet order.
+        return -to_epoch_micros(badge.awarded_at), -badge.badge_id
+
+    def _insert(self, generation: int, badges: List[Badge]) -> None:
+        if generation != self._generation:
+            return
+        for badge in badges:
+            if badge.badge_id in self._ids:
+                continue
+            row = bisect_left(self._badges, self._order_key(badge), key=self._order_key)
+            if row == len(self._badges) and not self._exhausted:
+                continue  # Beyond the loaded pages; fetchMore will bring it.
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._badges.insert(row, badge)
+            self._ids.add(badge.badge_id)
+            self.endInsertRows()
 
-        subtitle = QLabel(badge.description)
-        subtitle.setWordWrap(True)
-        subtitle.setAlignment(Qt.AlignCenter)
-        subtitle.setFont(make_font(FONT_SIZES["caption"]))
-        layout.addWidget(subtitle)
 
-    def mousePressEvent(self, event) -> None:  # type: ignore[override]
-        if event.button() == Qt.LeftButton:
-            self.clicked.emit(self.badge)
-        super().mousePressEvent(event)
+class TrophyCardDelegate(QStyledItemDelegate):
+    """Paints a badge card: rounded frame, cached SVG icon, title and description."""
+
+    MARGIN = 12
+    PADDING = 24
+    SPACING = 12
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.icon_size = BADGE_ICON_SIZES["card"]
+        self.title_font = make_font(FONT_SIZES["body"], bold=True)
+        self.caption_font = make_font(FONT_SIZES["caption"])
+        self.card_size = QSize(320, 320)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:  # type: ignore[override]
+        return self.card_size
+
+    def paint(  # type: ignore[override]
+        self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> None:
+        badge: Optional[Badge] = index.data(BadgeListModel.BadgeRole)
+        if badge is None:
+            return
+        card = QRectF(option.rect).adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        hovered = bool(option.state & (QStyle.State_MouseOver | QStyle.State_HasFocus))
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor("#3B82F6" if hovered else "#DBEAFE"), 4))
+        painter.setBrush(QColor("#FFFFFF"))
+        painter.drawRoundedRect(card.adjusted(2, 2, -2, -2), 24, 24)
+
+        content = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        dpr = option.widget.devicePixelRatioF() if option.widget is not None else 1.0
+        pixmap = render_cache.pixmap(badge.svg_icon, self.icon_size, dpr)
+        icon_left = content.center().x() - self.icon_size.width() / 2
+        painter.drawPixmap(QPointF(icon_left, content.top()), pixmap)
+
+        top = content.top() + self.icon_size.height() + self.SPACING
+        painter.setPen(COLOR_PALETTE["text_primary"])
+        painter.setFont(self.title_font)
+        title_height = QFontMetrics(self.title_font).height()
+        title_rect = QRectF(content.left(), top, content.width(), title_height)
+        title = QFontMetrics(self.title_font).elidedText(badge.name, Qt.ElideRight, int(content.width()))
+        painter.drawText(title_rect, Qt.AlignCenter, title)
+
+        top += title_height + self.SPACING / 2
+        painter.setPen(COLOR_PALETTE["text_secondary"])
+        painter.setFont(self.caption_font)
+        caption_rect = QRectF(content.left(), top, content.width(), max(content.bottom() - top, 0))
+        painter.drawText(caption_rect, Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap, badge.description)
+        painter.restore()
+
+
+class TrophyGridView(QListView):
+    """Icon-mode list view that lays the cards out in a fixed number of columns."""
+
+    COLUMNS = 3
+
+    def __init__(self, delegate: TrophyCardDelegate, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._delegate = delegate
+        self.setItemDelegate(delegate)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QListView.SingleSelection)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(24)
+        self.setMouseTracking(True)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setStyleSheet("QListView { background: transparent; }")
+
+    def _card_height(self) -> int:
+        metrics = QFontMetrics(self._delegate.caption_font)
+        return (
+            2 * (TrophyCardDelegate.MARGIN + TrophyCardDelegate.PADDING)
+            + self._delegate.icon_size.height()
+            + QFontMetrics(self._delegate.title_font).height()
+            + TrophyCardDelegate.SPACING * 3 // 2
+            + 2 * metrics.lineSpacing()
+        )
+
+    def resizeEvent(self, event) -> None:  # type: ignore[override]
+        width = max(self.viewport().width() // self.COLUMNS, 1)
+        size = QSize(width, self._card_height())
+        if size != self._delegate.card_size:
+            self._delegate.card_size = size
+            self.setGridSize(size)
+        super().resizeEvent(event)
 
 
 class TrophyCabinetTab(QWidget):
-    def __init__(self, store: DataStore, parent: Optional[QWidget] = None) -> None:
+    def __init__(self, store: DataStore, worker: AsyncDataStore, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
         self.store = store
+        self.worker = worker
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -105,46 +299,42 @@ class TrophyCabinetTab(QWidget):
         header.setFont(make_font(FONT_SIZES["heading"], bold=True))
         layout.addWidget(header)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        layout.addWidget(self.scroll_area)
+        self.busy = BusyIndicator()
+        layout.addWidget(self.busy)
+
+        self.model = BadgeListModel(worker, self)
+        self.model.busy = self.busy
+        self.model.loadFailed.connect(
+            lambda error: show_error(self, "Orden konnten nicht geladen werden.", error)
+        )
+        self.model.pageLoaded.connect(self._update_empty_state)
+        self.model.rowsInserted.connect(self._update_empty_state)
+
+        self.view = TrophyGridView(TrophyCardDelegate(self))
+        self.view.setModel(self.model)
+        self.view.clicked.connect(self._show_details)
+
+        self.empty_label = QLabel("Noch keine Orden – verteile Belohnungen!")
+        self.empty_label.setFont(make_font(FONT_SIZES["body"], bold=True))
+        self.empty_label.setAlignment(Qt.AlignCenter)
 
-        container = QWidget()
-        self.grid = QGridLayout(container)
-        self.grid.setSpacing(24)
-        self.grid.setContentsMargins(12, 12, 12, 12)
-        self.scroll_area.setWidget(container)
+        self.stack = QStackedWidget()
+        self.stack.addWidget(self.view)
+        self.stack.addWidget(self.empty_label)
+        layout.addWidget(self.stack)
 
         self.refresh()
 
     def refresh(self) -> None:
-        badges = self._collect_badges()
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
-        if not badges:
-            empty = QLabel("Noch keine Orden – verteile Belohnungen!")
-            empty.setFont(make_font(FONT_SIZES["body"], bold=True))
-            empty.setAlignment(Qt.AlignCenter)
-            self.grid.addWidget(empty, 0, 0)
-            return
-
-        for index, badge in enumerate(badges):
-            card = TrophyCard(badge)
-            card.clicked.connect(self._show_details)
-            row = index // 3
-            col = index % 3
-            self.grid.addWidget(card, row, col)
+        self.model.reload()
 
-    def _collect_badges(self) -> List[Badge]:
-        badges: List[Badge] = []
-        for student in self.store.list_students():
-            badges.extend(student.badges)
-        return badges
+    def _update_empty_state(self) -> None:
+        empty = self.model.rowCount() == 0 and self.model.exhausted
+        self.stack.setCurrentWidget(self.empty_label if empty else self.view)
 
-    def _show_details(self, badge: Badge) -> None:
+    def _show_details(self, index: QModelIndex) -> None:
+        badge = self.model.badge(index)
+        if badge is None:
+            return
         dialog = BadgeDetailDialog(badge, self)
         dialog.exec_()
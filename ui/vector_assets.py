@@ -1,6 +1,21 @@
-"""Vector assets expressed as inline SVG strings."""
+"""Vector assets expressed as inline SVG strings, plus a shared render cache."""
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from PyQt5.QtCore import QByteArray, QRectF, QRunnable, QSize, Qt, QThreadPool
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtSvg import QSvgRenderer
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from data.assets import content_hash
+from data.cache import CacheStats
+from data.instrumentation import ui_finished, ui_started
+from data.svg_ingest import ingest_svg
+
 AVATAR_SVG = """
 <svg width="400" height="400" viewBox="0 0 400 400" xmlns="http://www.w3.org/2000/svg">
   <defs>
@@ -46,3 +61,257 @@ BADGE_SVGS = {
         </svg>
     """,
 }
+
+
+# ----------------------------------------------------------------------
+# Shared render cache
+# ----------------------------------------------------------------------
+RenderKey = Tuple[str, int, int, float]
+
+
+@lru_cache(maxsize=2048)
+def svg_key(svg: str) -> str:
+    """Content hash of ``svg``; memoized because the same strings recur constantly."""
+    return content_hash(svg)
+
+
+def _target_rect(renderer: QSvgRenderer, width: float, height: float) -> QRectF:
+    """Fit the document into ``width`` x ``height`` keeping its aspect ratio."""
+    natural = renderer.viewBoxF().size()
+    if natural.isEmpty():
+        return QRectF(0, 0, width, height)
+    natural.scale(width, height, Qt.KeepAspectRatio)
+    return QRectF((width - natural.width()) / 2, (height - natural.height()) / 2, natural.width(), natural.height())
+
+
+def render_image(
+    svg: str, size: QSize, device_pixel_ratio: float = 1.0, renderer: Optional[QSvgRenderer] = None
+) -> QImage:
+    """Rasterize ``svg`` into a transparent image; safe to call from worker threads."""
+    renderer = renderer or QSvgRenderer(QByteArray(svg.encode("utf-8")))
+    image = QImage(
+        max(round(size.width() * device_pixel_ratio), 1),
+        max(round(size.height() * device_pixel_ratio), 1),
+        QImage.Format_ARGB32_Premultiplied,
+    )
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    renderer.render(painter, _target_rect(renderer, image.width(), image.height()))
+    painter.end()
+    image.setDevicePixelRatio(device_pixel_ratio)
+    return image
+
+
+class PrewarmHandle:
+    """Lets the caller drop prewarm jobs that have not started yet."""
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class _PrewarmJob(QRunnable):
+    def __init__(
+        self, cache: "SvgRenderCache", svg: str, size: QSize, device_pixel_ratio: float, handle: PrewarmHandle
+    ) -> None:
+        super().__init__()
+        self._cache = cache
+        self._svg = svg
+        self._size = size
+        self._dpr = device_pixel_ratio
+        self._handle = handle
+
+    def run(self) -> None:
+        if self._handle.cancelled:
+            return
+        key = self._cache.key(self._svg, self._size, self._dpr)
+        if not self._cache.contains(key):
+            started = ui_started()
+            self._cache._store(key, render_image(self._svg, self._size, self._dpr))
+            ui_finished("svg.prewarm", started)
+
+
+class SvgRenderCache:
+    """Pre-rendered pixmaps and parsed renderers shared by every SVG widget.
+
+    Entries are keyed by (content hash, target size, device pixel ratio) and
+    evicted least-recently-used once the rasters exceed ``budget_bytes``.
+    Renderers and pixmaps are for the GUI thread; :meth:`prewarm` rasterizes
+    into ``QImage`` on a thread pool and the image is turned into a pixmap on
+    first use.
+    """
+
+    def __init__(self, budget_bytes: int = 64 * 1024 * 1024, max_renderers: int = 256) -> None:
+        self.budget_bytes = budget_bytes
+        self.max_renderers = max_renderers
+        self._rasters: OrderedDict[RenderKey, Union[QPixmap, QImage]] = OrderedDict()
+        self._renderers: OrderedDict[str, QSvgRenderer] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[QThreadPool] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(svg: str, size: QSize, device_pixel_ratio: float) -> RenderKey:
+        return (svg_key(svg), size.width(), size.height(), round(device_pixel_ratio, 2))
+
+    @staticmethod
+    def _cost(key: RenderKey) -> int:
+        _, width, height, dpr = key
+        return int(width * dpr) * int(height * dpr) * 4
+
+    def contains(self, key: RenderKey) -> bool:
+        return key in self._rasters
+
+    def renderer(self, svg: str) -> QSvgRenderer:
+        """Return a parsed renderer for ``svg``, parsing each document only once."""
+        digest = svg_key(svg)
+        renderer = self._renderers.get(digest)
+        if renderer is None:
+            started = ui_started()
+            renderer = QSvgRenderer(QByteArray(svg.encode("utf-8")))
+            ui_finished("svg.parse", started)
+            self._renderers[digest] = renderer
+            while len(self._renderers) > self.max_renderers:
+                self._renderers.popitem(last=False)
+        else:
+            self._renderers.move_to_end(digest)
+        return renderer
+
+    def pixmap(self, svg: str, size: QSize, device_pixel_ratio: float = 1.0) -> QPixmap:
+        key = self.key(svg, size, device_pixel_ratio)
+        with self._lock:
+            cached = self._rasters.get(key)
+            if cached is not None:
+                self._hits += 1
+                self._rasters.move_to_end(key)
+        if isinstance(cached, QPixmap):
+            return cached
+        if cached is None:
+            self._misses += 1
+            started = ui_started()
+            cached = render_image(svg, size, device_pixel_ratio, self.renderer(svg))
+            ui_finished("svg.render", started)
+        pixmap = QPixmap.fromImage(cached)
+        self._store(key, pixmap)
+        return pixmap
+
+    def _store(self, key: RenderKey, raster: Union[QPixmap, QImage]) -> None:
+        with self._lock:
+            if key not in self._rasters:
+                self._bytes += self._cost(key)
+            self._rasters[key] = raster
+            self._rasters.move_to_end(key)
+            while self._bytes > self.budget_bytes and len(self._rasters) > 1:
+                evicted, _ = self._rasters.popitem(last=False)
+                self._bytes -= self._cost(evicted)
+                self._evictions += 1
+
+    def prewarm(
+        self, svgs: Iterable[str], sizes: Iterable[QSize], device_pixel_ratio: float = 1.0
+    ) -> PrewarmHandle:
+        """Render ``svgs`` at every size in the background so widgets appear instantly.
+
+        Cancelling the returned handle skips the jobs that have not run yet.
+        """
+        if self._pool is None:
+            self._pool = QThreadPool()
+            self._pool.setMaxThreadCount(2)
+        handle = PrewarmHandle()
+        sizes = list(sizes)
+        for svg in dict.fromkeys(svgs):
+            for size in sizes:
+                if not self.contains(self.key(svg, size, device_pixel_ratio)):
+                    self._pool.start(_PrewarmJob(self, svg, size, device_pixel_ratio, handle))
+        return handle
+
+    def stop_prewarm(self) -> None:
+        """Drop queued prewarm jobs and wait for running ones.
+
+        Must run before the QApplication goes away; background rasterization
+        during teardown crashes Qt.
+        """
+        if self._pool is not None:
+            self._pool.clear()
+            self._pool.waitForDone()
+
+    def set_budget(self, budget_bytes: int) -> None:
+        self.budget_bytes = budget_bytes
+        with self._lock:
+            while self._bytes > self.budget_bytes and self._rasters:
+                evicted, _ = self._rasters.popitem(last=False)
+                self._bytes -= self._cost(evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rasters.clear()
+            self._bytes = 0
+        self._renderers.clear()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._rasters),
+            capacity=self.budget_bytes,
+        )
+
+
+render_cache = SvgRenderCache()
+
+BADGE_ICON_SIZES: Dict[str, QSize] = {
+    "gallery": QSize(128, 128),
+    "card": QSize(160, 160),
+    "detail": QSize(192, 192),
+}
+
+
+def prewarm_badge_icons(device_pixel_ratio: float = 1.0) -> PrewarmHandle:
+    """Warm :data:`render_cache` with the built-in badge icons at every badge size.
+
+    Badges are stored with their SVG ingested, so the ingested markup is what
+    the widgets later look up, not the source in :data:`BADGE_SVGS`.
+    """
+    svgs = [ingest_svg(svg).svg for svg in BADGE_SVGS.values()]
+    return render_cache.prewarm(svgs, BADGE_ICON_SIZES.values(), device_pixel_ratio)
+
+
+class SvgIcon(QWidget):
+    """Paints an SVG through :data:`render_cache` instead of parsing it per widget."""
+
+    def __init__(self, svg: str = "", parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._svg = svg
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
+
+    def svg(self) -> str:
+        return self._svg
+
+    def set_svg(self, svg: str) -> None:
+        if svg is not self._svg and svg != self._svg:
+            self._svg = svg
+            self.update()
+
+    def sizeHint(self) -> QSize:  # type: ignore[override]
+        return QSize(128, 128)
+
+    def paintEvent(self, event) -> None:  # type: ignore[override]
+        if not self._svg or self.width() <= 0 or self.height() <= 0:
+            return
+        pixmap = render_cache.pixmap(self._svg, self.size(), self.devicePixelRatioF())
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()